@@ -0,0 +1,111 @@
+"""压缩包输入：结果与解压后按文件夹合并相同；tar顺序读取，缓冲区有上限"""
+import contextlib
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from vdfmerge import archives, batch_merge_folders
+
+FILES1 = {
+    'a.vdf': "[s]\nk = 1,1\nj = 2\n",
+    'b.vdf': "[s]\nk = 3\n",
+    'c.vdf': "[t]\nx = 1\n",
+    'c_v1.vdf': "[t]\nx = 1\ny = 2\n",
+    'only1.vdf': "[u]\nz = 9\n",
+}
+FILES2 = {
+    'c_v1.vdf': "[t]\nx = 7\n",
+    'b.vdf': "[s]\nk = 3\n",
+    'a.vdf': "[s]\nk = 5,5\n",
+    'c.vdf': "[t]\nx = 8\n",
+    'only2.vdf': "[u]\nz = 0\n",
+}
+
+
+def write_folder(root, files):
+    for name, text in files.items():
+        path = os.path.join(root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', newline='') as f:
+            f.write(text)
+    return str(root)
+
+
+def write_archive(path, files, top):
+    """按files的顺序写入压缩包，所有成员放在顶层目录top下"""
+    if str(path).endswith('.zip'):
+        with zipfile.ZipFile(path, 'w') as zf:
+            for name, text in files.items():
+                zf.writestr(f"{top}/{name}", text)
+    else:
+        with tarfile.open(path, 'w:gz') as tar:
+            for name, text in files.items():
+                data = text.encode('utf-8')
+                info = tarfile.TarInfo(f"{top}/{name}")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+def read_folder(root):
+    result = {}
+    for folder, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(folder, filename)
+            with open(path, 'rb') as f:
+                result[os.path.relpath(path, root).replace(os.sep, '/')] = f.read()
+    return result
+
+
+def quiet_merge(*args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return batch_merge_folders(*args, **kwargs)
+
+
+@pytest.fixture
+def expected(tmp_path):
+    def merge(variants):
+        output = tmp_path / f'expected_{variants}'
+        quiet_merge(write_folder(tmp_path / 'f1', FILES1), write_folder(tmp_path / 'f2', FILES2), str(output),
+                    variants=variants)
+        return read_folder(output)
+    return merge
+
+
+@pytest.mark.parametrize('kind1, kind2', [('tar', 'tar'), ('tar', 'zip'), ('zip', 'tar'), ('folder', 'tar')])
+@pytest.mark.parametrize('variants', [None, 'auto'])
+@pytest.mark.parametrize('buffer_bytes', [archives.TAR_BUFFER_BYTES, 0])
+def test_archive_merge_matches_folder_merge(tmp_path, monkeypatch, expected, kind1, kind2, variants, buffer_bytes):
+    monkeypatch.setattr(archives, 'TAR_BUFFER_BYTES', buffer_bytes)
+
+    def make(kind, files, name):
+        if kind == 'folder':
+            return write_folder(tmp_path / name, files)
+        return write_archive(tmp_path / f"{name}.{'zip' if kind == 'zip' else 'tar.gz'}", files, name)
+
+    output = tmp_path / 'out'
+    report = quiet_merge(make(kind1, FILES1, '1'), make(kind2, FILES2, '2'), str(output), variants=variants)
+    assert read_folder(output) == expected(variants)
+    assert (report['files'], report['skipped']) == (5, 0)
+
+
+def test_tar_reads_in_stream_order_and_buffers_only_needed_members(tmp_path):
+    source = archives.open_vdf_source(write_archive(tmp_path / '2.tar.gz', FILES2, '2'))
+    try:
+        assert source['members']['a.vdf'] == '2/a.vdf'
+        source['wanted'] = {'a.vdf', 'b.vdf', 'c_v1.vdf'}
+        # a.vdf在流中排第三：越过的c_v1.vdf和b.vdf之后还要读取，放入缓冲区
+        assert archives.read_member_bytes(source, 'a.vdf') == FILES2['a.vdf'].encode()
+        assert sorted(source['buffer']) == ['b.vdf', 'c_v1.vdf']
+        assert archives.read_member_bytes(source, 'b.vdf') == FILES2['b.vdf'].encode()
+        assert archives.read_member_bytes(source, 'c.vdf') == FILES2['c.vdf'].encode()
+        assert archives.read_member_bytes(source, 'c_v1.vdf') == FILES2['c_v1.vdf'].encode()
+        assert source['buffer'] == {} and source['buffered_bytes'] == 0
+        # a.vdf已经越过且没有缓冲：重新从头读
+        assert archives.read_member_bytes(source, 'a.vdf') == FILES2['a.vdf'].encode()
+        assert source['index'] == 3
+    finally:
+        archives.close_vdf_io(source)
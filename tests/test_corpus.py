@@ -0,0 +1,39 @@
+"""去重载入：只在一个文件中出现的值的清理，以及向已有的池追加文件"""
+from vdfmerge.corpus import load_corpus
+
+
+def write_files(tmp_path, texts):
+    tmp_path.mkdir(exist_ok=True)
+    paths = []
+    for number, text in enumerate(texts):
+        path = tmp_path / f"f{number}.vdf"
+        path.write_text(text, encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+
+def test_new_pool_drops_values_used_by_one_file(tmp_path):
+    paths = write_files(tmp_path, ["[s]\nk = 1,2\nu = a\n", "[s]\nk = 1,2\nu = b\n"])
+    corpus = load_corpus(paths)
+    assert corpus['stats']['pruned_objects'] > 0
+    assert 'k = 1,2' in corpus['pool']
+    assert 'u = a' not in corpus['pool'] and 'u = b' not in corpus['pool']
+    assert corpus['documents'][paths[0]]['data']['s'] == {'k': '1,2', 'u': 'a'}
+
+
+def test_existing_pool_keeps_values_for_later_files(tmp_path):
+    paths = write_files(tmp_path, ["[s]\nk = 1,2\nu = a\n", "[s]\nk = 3\nu = b\n", "[s]\nk = 3\nu = c\n"])
+    pool = load_corpus(paths[:1], prune=False)['pool']
+    assert 'u = a' in pool
+
+    # 默认不清理传入的池：只在第二个文件中出现的'k = 3'留给第三个文件共享
+    second = load_corpus(paths[1:2], pool=pool)
+    assert second['stats']['pruned_objects'] == 0
+    third = load_corpus(paths[2:], pool=pool)
+    assert third['documents'][paths[2]]['data']['s']['k'] is second['documents'][paths[1]]['data']['s']['k']
+
+    # 显式清理传入的池时只删除本次新加入的值
+    extra = write_files(tmp_path / 'more', ["[s]\nk = 1,2\nu = d\n"])
+    load_corpus(extra, pool=pool, prune=True)
+    assert 'u = d' not in pool
+    assert 'u = a' in pool and 'u = c' in pool
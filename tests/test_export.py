@@ -0,0 +1,114 @@
+"""导出到SQLite：数值LUT的识别、键的行序、注释、重叠参数，以及增量更新"""
+import os
+import sqlite3
+from array import array
+
+import pytest
+
+from vdfmerge.export import export_vdf_tree, parse_numeric_components
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1,2,3', [1.0, 2.0, 3.0]),
+    (' 1.5 , -2e3 ,', [1.5, -2000.0]),
+    ('1, 0x10, -0X1f', [1.0, 16.0, -31.0]),
+    ('nan,1', None),
+    ('1,inf', None),
+    ('-Infinity', None),
+    ('1_0,2', None),
+    ('0x1_0', None),
+    ('1,,2', None),
+    ('a,1', None),
+    ('', None),
+])
+def test_parse_numeric_components(value, expected):
+    assert parse_numeric_components(value) == expected
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+def query(db_path, sql, *params):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+
+
+def file_keys(db_path, relpath):
+    return query(db_path, "SELECT s.name, k.position, k.name, k.occurrence, k.value FROM keys k "
+                          "JOIN sections s ON s.section_id = k.section_id JOIN files f ON f.file_id = k.file_id "
+                          "WHERE f.relpath = ? ORDER BY s.position, k.position", relpath)
+
+
+def test_key_positions_follow_line_order(tmp_path):
+    write(str(tmp_path / 'tree' / 'a.vdf'), "[s]\na = 1\nb = 2\na = 3\nc = 4\n[t]\nz = 1\n[s]\nb = 9\n")
+    export_vdf_tree([str(tmp_path / 'tree')], str(tmp_path / 'db.sqlite'))
+    assert file_keys(str(tmp_path / 'db.sqlite'), 'a.vdf') == [
+        ('s', 0, 'a', 0, '1'), ('s', 1, 'b', 0, '2'), ('s', 2, 'a', 1, '3'), ('s', 3, 'c', 0, '4'),
+        ('s', 4, 'b', 1, '9'), ('t', 0, 'z', 0, '1'),
+    ]
+
+
+def test_numeric_luts_and_comments(tmp_path):
+    write(str(tmp_path / 'tree' / 'a.vdf'),
+          "; header\n[s]\n；全角注释\n// slash\nlut = 1, 0x10 ;note\nodd = nan,1\nsep = 1_0\nname = abc\n")
+    db_path = str(tmp_path / 'db.sqlite')
+    export_vdf_tree([str(tmp_path / 'tree')], db_path)
+    rows = {name: (count, lut) for name, count, lut in query(db_path, "SELECT name, component_count, lut FROM keys")}
+    assert rows['lut'] == (2, array('d', [1.0, 16.0]).tobytes())
+    assert rows['odd'] == (2, None)
+    assert rows['sep'] == (1, None)
+    assert rows['name'] == (1, None)
+    comments = query(db_path, "SELECT section_id IS NULL, key_id IS NULL, text FROM comments ORDER BY comment_id")
+    assert comments == [(1, 1, '; header'), (0, 1, '；全角注释'), (0, 1, '// slash'), (0, 0, 'note')]
+
+
+def test_overlapping_arguments_export_each_file_once(tmp_path):
+    tree = str(tmp_path / 'tree')
+    write(os.path.join(tree, 'a.vdf'), "[s]\nk = 1\n")
+    write(os.path.join(tree, 'sub', 'b.vdf'), "[s]\nk = 2\n")
+    db_path = str(tmp_path / 'db.sqlite')
+    stats = export_vdf_tree([tree, tree, os.path.join(tree, 'a.vdf')], db_path)
+    assert (stats['files'], stats['exported']) == (2, 2)
+    assert sorted(query(db_path, "SELECT relpath FROM files")) == [('a.vdf',), ('sub/b.vdf',)]
+    assert query(db_path, "SELECT COUNT(*) FROM keys") == [(2,)]
+
+
+def test_incremental_export(tmp_path):
+    tree = str(tmp_path / 'tree')
+    db_path = str(tmp_path / 'db.sqlite')
+    paths = {name: os.path.join(tree, name) for name in ('a.vdf', 'b.vdf', 'c.vdf')}
+    for name, path in paths.items():
+        write(path, f"[s]\nk = 1\n; {name}\n")
+    assert export_vdf_tree([tree], db_path) == {'files': 3, 'exported': 3, 'unchanged': 0, 'removed': 0}
+
+    # 未变化：全部跳过
+    assert export_vdf_tree([tree], db_path) == {'files': 3, 'exported': 0, 'unchanged': 3, 'removed': 0}
+
+    # 只改修改时间：哈希相同，仍跳过
+    st = os.stat(paths['a.vdf'])
+    os.utime(paths['a.vdf'], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert export_vdf_tree([tree], db_path)['unchanged'] == 3
+
+    # 内容变化：重新写入，旧行删除；已删除的文件从数据库中删除
+    write(paths['b.vdf'], "[s]\nk = 2\nj = 3\n")
+    os.utime(paths['b.vdf'], ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10 ** 9))
+    os.remove(paths['c.vdf'])
+    assert export_vdf_tree([tree], db_path) == {'files': 2, 'exported': 1, 'unchanged': 1, 'removed': 1}
+    assert file_keys(db_path, 'b.vdf') == [('s', 0, 'k', 0, '2'), ('s', 1, 'j', 0, '3')]
+    assert sorted(query(db_path, "SELECT relpath FROM files")) == [('a.vdf',), ('b.vdf',)]
+    file_ids = {file_id for (file_id,) in query(db_path, "SELECT file_id FROM files")}
+    for table in ('sections', 'keys', 'comments'):
+        # 不留下已删除或旧版本文件的行
+        assert {file_id for (file_id,) in query(db_path, f"SELECT DISTINCT file_id FROM {table}")} <= file_ids
+    assert query(db_path, "SELECT text FROM comments") == [('; a.vdf',)]
+
+    # prune=False时保留已删除文件的行
+    os.remove(paths['b.vdf'])
+    assert export_vdf_tree([tree], db_path, prune=False)['removed'] == 0
+    assert len(query(db_path, "SELECT relpath FROM files")) == 2
@@ -0,0 +1,83 @@
+"""两方合并：重复键的配对规则，以及解析/生成/保存的原样往返（CRLF、文件末尾换行）"""
+import pytest
+
+from vdfmerge import (
+    generate_vdf_content,
+    get_key_occurrence,
+    merge_vdf_data,
+    parse_vdf_content,
+    read_vdf_file,
+    save_vdf_file,
+)
+
+
+def merge(text1, text2):
+    return generate_vdf_content(merge_vdf_data(parse_vdf_content(text1), parse_vdf_content(text2)))
+
+
+def test_duplicate_keys_keep_every_occurrence():
+    parsed = parse_vdf_content("[s]\nk = 1,1\nk = 2,2\nk = 3,3\n")
+    # data中为生效值（最后一次出现），duplicate_keys中保留每次出现
+    assert parsed['data']['s']['k'] == '3,3'
+    assert [record['value'] for record in parsed['duplicate_keys']['s']['k']] == ['1,1', '2,2', '3,3']
+
+
+def test_get_key_occurrence_falls_back_to_effective_value():
+    parsed = parse_vdf_content("[s]\nk = 7,7\nk = 8,8\n")
+    assert get_key_occurrence(parsed, 's', 'k', 0)['value'] == '7,7'
+    assert get_key_occurrence(parsed, 's', 'k', 1)['value'] == '8,8'
+    # 重复次数不足时取生效值
+    assert get_key_occurrence(parsed, 's', 'k', 2)['value'] == '8,8'
+
+    single = parse_vdf_content("[s]\nk = 5\n")
+    assert get_key_occurrence(single, 's', 'k', 3)['value'] == '5'
+
+
+def test_duplicate_keys_pair_by_occurrence():
+    assert merge("[s]\nk = 1,1\nk = 2,2\n", "[s]\nk = 7,7\nk = 8,8\n") == "[s]\nk = 7,7\nk = 8,8\n"
+
+
+def test_vdf1_with_more_duplicates_pairs_extra_occurrences_with_effective_value():
+    assert merge("[s]\nk = 1,1\nk = 2,2\nk = 3,3\n", "[s]\nk = 7,7\nk = 8,8\n") == \
+        "[s]\nk = 7,7\nk = 8,8\nk = 8,8\n"
+    assert merge("[s]\nk = 1,1\nk = 2,2\n", "[s]\nk = 9,9\n") == "[s]\nk = 9,9\nk = 9,9\n"
+
+
+def test_duplicate_key_count_mismatch_keeps_vdf1_for_that_occurrence_only():
+    assert merge("[s]\nk = 1,1\nk = 2,2\n", "[s]\nk = 9\nk = 8,8\n") == "[s]\nk = 1,1\nk = 8,8\n"
+
+
+def test_duplicate_sections_are_kept():
+    assert merge("[a]\nx = 1\n[a]\nx = 2\n", "[a]\nx = 3\n") == "[a]\nx = 3\n[a]\nx = 3\n"
+
+
+@pytest.mark.parametrize('text', [
+    "[s]\nk = 1 ;c\n\n[t]\nj=2\n",
+    "[s]\nk = 1 ;c\n\n[t]\nj=2",
+    "[s]\r\nk = 1 ;c\r\n\r\n[t]\r\nj=2\r\n",
+    "[s]\r\nk = 1 ;c\r\n\r\n[t]\r\nj=2",
+    "; header\r\n[s]\r\nk = 1\r\n\r\n",
+])
+def test_parse_generate_round_trip(text):
+    assert generate_vdf_content(parse_vdf_content(text)) == text
+
+
+def test_crlf_keys_and_comments_have_no_carriage_return():
+    parsed = parse_vdf_content("[s]\r\nk = 1 ;note\r\nj=2\r\n")
+    assert parsed['newline'] == '\r\n'
+    assert parsed['data']['s'] == {'k': '1', 'j': '2'}
+    assert parsed['line_comments']['s']['k'] == 'note'
+
+
+def test_merge_keeps_crlf_and_missing_final_newline():
+    assert merge("[s]\r\nk = 1,1\r\nj = 3\r\n", "[s]\r\nk = 2,2\r\n") == "[s]\r\nk = 2,2\r\nj = 3\r\n"
+    assert merge("[s]\nk = 1,1", "[s]\nk = 2,2\n") == "[s]\nk = 2,2"
+
+
+@pytest.mark.parametrize('data', [b"[s]\r\nk = 1\r\n", b"[s]\r\nk = 1", b"[s]\nk = 1\n"])
+def test_save_writes_file_unchanged(tmp_path, data):
+    source = tmp_path / 'in.vdf'
+    source.write_bytes(data)
+    output = tmp_path / 'out' / 'out.vdf'
+    save_vdf_file(read_vdf_file(str(source)), str(output))
+    assert output.read_bytes() == data
@@ -0,0 +1,47 @@
+"""schema校验：规则字段的类型检查，分量个数与合并时一致，以及校验结果的记忆"""
+import pytest
+
+from vdfmerge import parse_vdf_content
+from vdfmerge.core import get_value_component_count
+from vdfmerge.schema import compile_schema, validate_vdf_data
+
+
+def check(rule, value):
+    violations = validate_vdf_data(parse_vdf_content(f"[s]\nk = {value}\n"), compile_schema({'s': {'k': rule}}))
+    return [(v['rule'], v['expected'], v['actual']) for v in violations]
+
+
+@pytest.mark.parametrize('rule', [{'count': '3'}, {'count': True}, {'count': 0}, {'count': 1.5},
+                                  {'type': 'int', 'min': '0'}, {'type': 'float', 'max': [1]}, {'type': 'hex'}])
+def test_invalid_rule_raises_value_error(rule):
+    with pytest.raises(ValueError):
+        compile_schema({'s': {'k': rule}})
+
+
+@pytest.mark.parametrize('value', ['1,2,', '1,,2', ' , 1, 2', '1, ,2', 'a b, c'])
+def test_component_count_matches_merge(value):
+    assert get_value_component_count(value) == 2
+    assert check({'count': 2}, value) == []
+    assert check({'count': 3}, value) == [('count', 3, 2)]
+
+
+@pytest.mark.parametrize('rule, value, expected', [
+    ({'count': 2, 'type': 'int', 'min': 0, 'max': 10}, '5, 30', [('range', [0, 10], [5, 30])]),
+    ({'count': 2, 'type': 'int', 'max': 10}, '0x10, 3', [('range', [None, 10], [3, 16])]),
+    ({'count': 2, 'type': 'int', 'min': 0, 'max': 10}, '1,,2', []),
+    ({'count': 2, 'type': 'int'}, '1_0, 2', [('format', 'int', '1_0, 2')]),
+    ({'count': 2, 'type': 'int'}, '1, x', [('type', 'int', "component 1: 'x'")]),
+    ({'count': 2, 'type': 'float', 'min': -1.0}, '-2.5, 1e0', [('range', [-1.0, None], [-2.5, 1.0])]),
+    ({'count': 1}, '', [('count', 1, 0)]),
+    ({}, '', []),
+])
+def test_value_rules(rule, value, expected):
+    assert check(rule, value) == expected
+
+
+def test_repeated_values_reuse_the_result():
+    schema = compile_schema({'*': {'k': {'count': 2, 'type': 'int', 'max': 10}}})
+    parsed = parse_vdf_content("[a]\nk = 1, 20\n[b]\nk = 1, 20\n[c]\nk = 1, 2\n")
+    violations = validate_vdf_data(parsed, schema)
+    assert [(v['section'], v['rule']) for v in violations] == [('a', 'range'), ('b', 'range')]
+    assert schema['wildcard']['k']['results'] == {'1, 20': ('range', [None, 10], [1, 20]), '1, 2': None}
@@ -0,0 +1,127 @@
+"""相似度索引：最接近的文件排第一，增量更新与清理，JSON保存/载入往返"""
+import os
+import random
+
+import pytest
+
+from vdfmerge import parse_vdf_content
+from vdfmerge.similarity import (
+    create_similarity_index,
+    load_similarity_index,
+    query_similar,
+    save_similarity_index,
+    update_similarity_index,
+)
+
+
+def random_config(rng):
+    lines = []
+    for section in range(rng.randint(3, 6)):
+        lines.append(f"[S{section}]")
+        for key in range(rng.randint(3, 8)):
+            lines.append(f"k{key} = " + ",".join(str(rng.randint(0, 1023)) for _ in range(8)))
+        lines.append(f"mode = {rng.choice(['a', 'b', 'c'])}")
+    return "\n".join(lines) + "\n"
+
+
+def perturb(text, rng):
+    """草稿：改动一行LUT中的一个分量"""
+    lines = text.split("\n")
+    candidates = [number for number, line in enumerate(lines) if line.startswith('k')]
+    number = rng.choice(candidates)
+    key, values = lines[number].split(' = ')
+    values = values.split(',')
+    values[0] = str(int(values[0]) + 1)
+    lines[number] = f"{key} = {','.join(values)}"
+    return "\n".join(lines)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    rng = random.Random(5)
+    folder = tmp_path / 'corpus'
+    folder.mkdir()
+    texts = {}
+    for number in range(30):
+        path = folder / f"cfg{number:02d}.vdf"
+        texts[str(path)] = random_config(rng)
+        path.write_text(texts[str(path)], encoding='utf-8')
+    return str(folder), texts
+
+
+def bump_mtime(path, seconds):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10 ** 9))
+
+
+def test_closest_file_ranks_first(corpus):
+    folder, texts = corpus
+    index = create_similarity_index()
+    assert update_similarity_index(index, [folder])['added'] == 30
+    rng = random.Random(11)
+    for target in rng.sample(sorted(texts), 5):
+        results = query_similar(index, parse_vdf_content(perturb(texts[target], rng)), top_k=3)
+        assert results[0]['name'] == target
+        assert results[0]['score'] > results[1]['score']
+        # exclude：查询已在索引中的文件时排除自身
+        results = query_similar(index, parse_vdf_content(texts[target]), top_k=3, exclude=target)
+        assert target not in [result['name'] for result in results]
+
+
+def test_exact_copy_scores_one(corpus):
+    folder, texts = corpus
+    index = create_similarity_index()
+    update_similarity_index(index, [folder])
+    target = sorted(texts)[7]
+    best = query_similar(index, parse_vdf_content(texts[target]), top_k=1)[0]
+    assert (best['name'], best['jaccard'], best['lut_distance'], best['score']) == (target, 1.0, 0.0, 1.0)
+
+
+def test_incremental_update_and_prune(corpus):
+    folder, texts = corpus
+    index = create_similarity_index()
+    update_similarity_index(index, [folder])
+    assert update_similarity_index(index, [folder]) == {'added': 0, 'updated': 0, 'unchanged': 30, 'removed': 0}
+
+    # 修改一个文件：只重新索引它，查询新内容时它排第一
+    changed, deleted = sorted(texts)[3], sorted(texts)[4]
+    new_text = random_config(random.Random(99))
+    with open(changed, 'w', encoding='utf-8') as f:
+        f.write(new_text)
+    bump_mtime(changed, 5)
+    os.remove(deleted)
+    assert update_similarity_index(index, [folder], prune=False) == \
+        {'added': 0, 'updated': 1, 'unchanged': 28, 'removed': 0}
+    assert query_similar(index, parse_vdf_content(new_text), top_k=1)[0]['name'] == changed
+    assert deleted in index['documents']
+
+    # 清理：删除的文件从文档和LSH桶中去掉；单独传入的文件不影响同目录下的其他文件
+    assert update_similarity_index(index, [changed])['removed'] == 0
+    assert update_similarity_index(index, [folder])['removed'] == 1
+    assert deleted not in index['documents']
+    assert all(deleted not in members for buckets in index['buckets'] for members in buckets.values())
+    assert deleted not in [result['name'] for result in
+                           query_similar(index, parse_vdf_content(texts[deleted]), top_k=5)]
+
+
+def test_json_round_trip(corpus, tmp_path):
+    folder, texts = corpus
+    index = create_similarity_index(num_bins=64, bands=16, lut_dims=32)
+    update_similarity_index(index, [folder])
+    index_path = str(tmp_path / 'index.json')
+    save_similarity_index(index, index_path)
+    loaded = load_similarity_index(index_path)
+
+    assert (loaded['num_bins'], loaded['bands'], loaded['lut_dims']) == (64, 16, 32)
+    assert loaded['documents'] == index['documents']
+    assert loaded['buckets'] == index['buckets']
+    draft = parse_vdf_content(perturb(texts[sorted(texts)[0]], random.Random(1)))
+    assert query_similar(loaded, draft) == query_similar(index, draft)
+    # 载入后继续增量更新
+    assert update_similarity_index(loaded, [folder])['unchanged'] == 30
+
+
+@pytest.mark.parametrize('num_bins, bands', [(100, 10), (128, 48)])
+def test_invalid_index_parameters(num_bins, bands):
+    with pytest.raises(ValueError):
+        create_similarity_index(num_bins=num_bins, bands=bands)
@@ -0,0 +1,83 @@
+"""参数扫描：覆盖项写时复制叠加在基线上，基线不变，未修改的章节原样输出"""
+import copy
+import json
+
+import pytest
+
+from vdfmerge import generate_vdf_content, parse_vdf_content
+from vdfmerge.sweep import apply_overrides, expand_sweep_grid, iter_sweep, load_sweep_spec, write_sweep
+
+BASELINE = ("; header\r\n"
+            "[A]\r\n"
+            "sigma =  1,2 ;tuned\r\n"
+            "gain=3\r\n"
+            "sigma = 5,6\r\n"
+            "\r\n"
+            "[B]\r\n"
+            "  odd   =   7 ,8   ;  keep me\r\n"
+            "; comment\r\n"
+            "other = x\r\n")
+
+
+@pytest.fixture
+def baseline():
+    return parse_vdf_content(BASELINE, 'base.vdf')
+
+
+def test_baseline_is_not_modified(baseline):
+    snapshot = copy.deepcopy(baseline)
+    overlay = apply_overrides(baseline, {('A', 'gain'): 9, ('B', 'other'): 'y'})
+    assert generate_vdf_content(overlay) != BASELINE
+    assert baseline == snapshot
+    assert generate_vdf_content(baseline) == BASELINE
+
+
+def test_untouched_sections_are_written_verbatim(baseline):
+    content = generate_vdf_content(apply_overrides(baseline, {('A', 'gain'): [4, 5]}))
+    assert content == BASELINE.replace("gain=3", "gain=4,5")
+
+
+def test_every_duplicate_key_line_is_replaced(baseline):
+    overlay = apply_overrides(baseline, {('A', 'sigma'): '0,0'})
+    assert generate_vdf_content(overlay) == \
+        BASELINE.replace("sigma =  1,2 ;tuned", "sigma =  0,0 ;tuned").replace("sigma = 5,6", "sigma = 0,0")
+    assert overlay['data']['A']['sigma'] == '0,0'
+    assert 'A' not in overlay['duplicate_keys']
+
+
+@pytest.mark.parametrize('overrides', [{('C', 'sigma'): 1}, {('A', 'missing'): 1}, {('B', 'sigma'): 1}])
+def test_unknown_section_or_key_raises(baseline, overrides):
+    with pytest.raises(ValueError):
+        apply_overrides(baseline, overrides)
+    with pytest.raises(ValueError):
+        next(iter_sweep(baseline, [{('A', 'gain'): 1}, overrides]))
+
+
+def test_iter_sweep_and_write_sweep(baseline, tmp_path):
+    override_list = expand_sweep_grid({('A', 'gain'): [1, 2], ('B', 'odd'): ['0', (1, 2)]})
+    assert override_list == [
+        {('A', 'gain'): 1, ('B', 'odd'): '0'}, {('A', 'gain'): 1, ('B', 'odd'): (1, 2)},
+        {('A', 'gain'): 2, ('B', 'odd'): '0'}, {('A', 'gain'): 2, ('B', 'odd'): (1, 2)},
+    ]
+    variants = list(iter_sweep(baseline, override_list))
+    assert [number for number, _, _ in variants] == [0, 1, 2, 3]
+    assert parse_vdf_content(variants[3][2])['data']['B']['odd'] == '1,2'
+    assert "  odd   =   1,2   ;  keep me\r\n" in variants[3][2]
+
+    written = write_sweep(baseline, override_list, str(tmp_path / 'out' / 'cfg_{index:02d}.vdf'))
+    assert [path for path, _ in written] == [str(tmp_path / 'out' / f'cfg_{n:02d}.vdf') for n in range(4)]
+    with open(written[1][0], 'rb') as f:
+        assert f.read().decode('utf-8') == variants[1][2]
+
+
+def test_load_sweep_spec(tmp_path):
+    spec_path = tmp_path / 'spec.json'
+    spec_path.write_text(json.dumps({
+        'grid': {'A': {'gain': [1, 2]}, 'B': {'odd': ['3,4']}},
+        'variants': [{'A': {'sigma': [0, 0], 'gain': 7}}],
+    }), encoding='utf-8')
+    assert load_sweep_spec(str(spec_path)) == [
+        {('A', 'gain'): 1, ('B', 'odd'): '3,4'},
+        {('A', 'gain'): 2, ('B', 'odd'): '3,4'},
+        {('A', 'sigma'): [0, 0], ('A', 'gain'): 7},
+    ]
@@ -0,0 +1,78 @@
+"""三方合并：冲突矩阵，以及theirs新增章节与文件末尾换行的位置"""
+import pytest
+
+from vdfmerge import generate_vdf_content, merge_vdf_three_way, parse_vdf_content
+
+BASE = "[s]\na = 1\nb = 2\nc = 3\n"
+
+
+def three_way(base, ours, theirs):
+    merged = merge_vdf_three_way(parse_vdf_content(base), parse_vdf_content(ours), parse_vdf_content(theirs))
+    conflicts = [(c['section'], c['key'], c['base'], c['ours'], c['theirs']) for c in merged['conflicts']]
+    return generate_vdf_content(merged), conflicts
+
+
+@pytest.mark.parametrize('ours, theirs, expected, conflicts', [
+    # 只有一方修改：取修改方
+    ("[s]\na = 5\nb = 2\nc = 3\n", BASE, "[s]\na = 5\nb = 2\nc = 3\n", []),
+    (BASE, "[s]\na = 6\nb = 2\nc = 3\n", "[s]\na = 6\nb = 2\nc = 3\n", []),
+    # 双方修改不同的键
+    ("[s]\na = 5\nb = 2\nc = 3\n", "[s]\na = 1\nb = 2\nc = 7\n", "[s]\na = 5\nb = 2\nc = 7\n", []),
+    # 双方修改为相同的值
+    ("[s]\na = 5\nb = 2\nc = 3\n", "[s]\na = 5\nb = 2\nc = 3\n", "[s]\na = 5\nb = 2\nc = 3\n", []),
+    # 修改/修改冲突：保留ours
+    ("[s]\na = 5\nb = 2\nc = 3\n", "[s]\na = 6\nb = 2\nc = 3\n", "[s]\na = 5\nb = 2\nc = 3\n",
+     [('s', 'a', '1', '5', '6')]),
+    # 修改/删除冲突：保留ours
+    ("[s]\na = 5\nb = 2\nc = 3\n", "[s]\nb = 2\nc = 3\n", "[s]\na = 5\nb = 2\nc = 3\n",
+     [('s', 'a', '1', '5', None)]),
+    ("[s]\nb = 2\nc = 3\n", "[s]\na = 6\nb = 2\nc = 3\n", "[s]\nb = 2\nc = 3\n",
+     [('s', 'a', '1', None, '6')]),
+    # 一方删除、另一方未修改：删除
+    (BASE, "[s]\nb = 2\nc = 3\n", "[s]\nb = 2\nc = 3\n", []),
+    # 双方新增同一个键：值相同时无冲突，不同时保留ours
+    ("[s]\na = 1\nb = 2\nc = 3\nd = 4\n", "[s]\na = 1\nb = 2\nc = 3\nd = 4\n", "[s]\na = 1\nb = 2\nc = 3\nd = 4\n", []),
+    ("[s]\na = 1\nb = 2\nc = 3\nd = 4\n", "[s]\na = 1\nb = 2\nc = 3\nd = 5\n", "[s]\na = 1\nb = 2\nc = 3\nd = 4\n",
+     [('s', 'd', None, '4', '5')]),
+])
+def test_key_conflict_matrix(ours, theirs, expected, conflicts):
+    assert three_way(BASE, ours, theirs) == (expected, conflicts)
+
+
+def test_section_conflicts():
+    base = "[s]\na=1\n[t]\nb=1\n"
+    assert three_way(base, "[s]\na=1\n[t]\nb=2\n", "[s]\na=1\n") == \
+        ("[s]\na=1\n[t]\nb=2\n", [('t', None, 'present', 'modified', None)])
+    assert three_way(base, "[s]\na=1\n", "[s]\na=1\n[t]\nb=3\n") == \
+        ("[s]\na=1\n", [('t', None, 'present', None, 'modified')])
+    # 双方新增同一个章节，键值不同
+    assert three_way("[s]\na=1\n", "[s]\na=1\n[u]\nx=1\n", "[s]\na=1\n[u]\nx=2\n") == \
+        ("[s]\na=1\n[u]\nx=1\n", [('u', 'x', None, '1', '2')])
+
+
+@pytest.mark.parametrize('base, ours, theirs, expected', [
+    # theirs新增的章节放在ours文件末尾的换行之前，不多出空行
+    ("[s]\nk = 1\n", "[s]\nk = 1\nj=2\n", "[s]\nk = 1\n[w]\nz=1\n", "[s]\nk = 1\nj=2\n[w]\nz=1\n"),
+    ("[s]\nk=1\n[u]\nq=1\n", "[s]\nk=1\n[u]\nq=1\n", "[s]\nk=1\n[w]\nz=1\n[u]\nq=1\n",
+     "[s]\nk=1\n[u]\nq=1\n[w]\nz=1\n"),
+    ("[s]\nk=1\n[u]\nq=1\n", "[s]\nk=1\n[u]\nq=1\n", "[s]\nk=1\n[u]\nq=1\n[w]\nz=1\n",
+     "[s]\nk=1\n[u]\nq=1\n[w]\nz=1\n"),
+    # 新增的最后一个章节在theirs中用来分隔的空行去掉
+    ("[s]\nk=1\n\n[u]\nq=1\n", "[s]\nk=1\n\n[u]\nq=1\n", "[s]\nk=1\n\n[w]\nz=1\n\n[v]\ny=2\n\n[u]\nq=1\n",
+     "[s]\nk=1\n\n[u]\nq=1\n[w]\nz=1\n\n[v]\ny=2\n"),
+    # ours没有末尾换行时，结果也没有
+    ("[s]\nk=1\n[u]\nq=1", "[s]\nk=1\n[u]\nq=1", "[s]\nk=1\n[u]\nq=1\n[w]\nz=1\n", "[s]\nk=1\n[u]\nq=1\n[w]\nz=1"),
+    # theirs删除了ours的最后一个章节
+    ("[s]\nk=1\n[u]\nq=1\n", "[s]\nk=1\n[u]\nq=1\n", "[s]\nk=1\n", "[s]\nk=1\n"),
+    # CRLF
+    ("[s]\r\nk=1\r\n[u]\r\nq=1\r\n", "[s]\r\nk=1\r\n[u]\r\nq=1\r\n", "[s]\r\nk=1\r\n[u]\r\nq=1\r\n[w]\r\nz=1\r\n",
+     "[s]\r\nk=1\r\n[u]\r\nq=1\r\n[w]\r\nz=1\r\n"),
+    ("[s]\r\nk=1\r\n", "[s]\r\nk=2\r\n", "[s]\r\nk=1\r\nj=3\r\n", "[s]\r\nk=2\r\nj=3\r\n"),
+])
+def test_end_of_file_newline(base, ours, theirs, expected):
+    assert three_way(base, ours, theirs) == (expected, [])
+
+
+def test_unchanged_merge_is_identity():
+    text = "; header\r\n[s]\r\nk = 1 ;c\r\n\r\n[t]\r\nj=2\r\n"
+    assert three_way(text, text, text) == (text, [])
@@ -0,0 +1,82 @@
+"""派生配置：variants='auto'共享基础配置的解析与章节合并，结果必须与逐个文件合并逐字节相同"""
+import contextlib
+import io
+import os
+import random
+
+import pytest
+
+from vdfmerge import batch_merge_folders
+
+
+def random_value(rng):
+    return ",".join(str(rng.randint(0, 3)) for _ in range(rng.choice([1, 2, 2, 3])))
+
+
+def random_sections(rng):
+    sections = []
+    for number in range(rng.randint(1, 6)):
+        lines = [f"k{rng.randint(0, 5)} = {random_value(rng)}" for _ in range(rng.randint(0, 6))]
+        if rng.random() < 0.2:
+            lines.append("; comment")
+        sections.append((f"S{number % 4}", lines))
+    return sections
+
+
+def mutate(rng, sections):
+    """派生配置：大部分章节与基础配置相同，少数修改、删除或新增"""
+    result = []
+    for name, lines in sections:
+        roll = rng.random()
+        if roll < 0.15:
+            continue
+        if roll < 0.35:
+            lines = [line if rng.random() < 0.5 else f"k{rng.randint(0, 5)} = {random_value(rng)}" for line in lines]
+        result.append((name, lines))
+    if rng.random() < 0.3:
+        result.append((f"S{rng.randint(0, 6)}", [f"k0 = {random_value(rng)}"]))
+    return result
+
+
+def render(sections, newline):
+    text = newline.join(line for name, lines in sections for line in [f"[{name}]"] + lines)
+    return text + (newline if sections and len(text) % 3 else '')
+
+
+def write_tree(rng, root):
+    for side in ('1', '2'):
+        os.makedirs(root / side)
+    for number in range(rng.randint(1, 4)):
+        base = {side: random_sections(rng) for side in ('1', '2')}
+        newline = rng.choice(['\n', '\r\n'])
+        files = {f"cfg{number}.vdf": base}
+        for variant in range(rng.randint(0, 3)):
+            files[f"cfg{number}_v{variant}.vdf"] = {side: mutate(rng, base[side]) for side in ('1', '2')}
+        for filename, sides in files.items():
+            for side, sections in sides.items():
+                if side == '2' and rng.random() < 0.1:
+                    continue
+                with open(root / side / filename, 'w', newline='') as f:
+                    f.write(render(sections, newline))
+
+
+def read_outputs(folder):
+    result = {}
+    for filename in os.listdir(folder):
+        with open(os.path.join(folder, filename), 'rb') as f:
+            result[filename] = f.read()
+    return result
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_auto_variants_match_plain_merge(tmp_path, seed):
+    write_tree(random.Random(seed), tmp_path)
+    outputs = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, options in [('plain', {}), ('auto', {'variants': 'auto'}),
+                              ('auto_workers', {'variants': 'auto', 'workers': 2})]:
+            report = batch_merge_folders(str(tmp_path / '1'), str(tmp_path / '2'), str(tmp_path / name), **options)
+            assert report['skipped'] == 0
+            outputs[name] = read_outputs(tmp_path / name)
+    assert outputs['auto'] == outputs['plain']
+    assert outputs['auto_workers'] == outputs['plain']
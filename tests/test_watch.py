@@ -0,0 +1,59 @@
+"""监视模式：inotify事件的解析（用管道模拟inotify的文件描述符）"""
+import os
+
+import pytest
+
+from vdfmerge.watch import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_DELETE,
+    IN_ISDIR,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_Q_OVERFLOW,
+    INOTIFY_EVENT_HEADER,
+    read_inotify_changes,
+)
+
+
+def event(wd, mask, name=''):
+    encoded = name.encode() + b'\0' * (16 - len(name) % 16) if name else b''
+    return INOTIFY_EVENT_HEADER.pack(wd, mask, 0, len(encoded)) + encoded
+
+
+@pytest.fixture
+def fake_inotify():
+    read_fd, write_fd = os.pipe()
+    watches = {1: '/w/folder1', 2: '/w/folder2'}
+    added = []
+
+    def add_watch(directory):
+        added.append(directory)
+
+    yield (read_fd, watches, add_watch), write_fd, added
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def test_file_events(fake_inotify):
+    inotify, write_fd, added = fake_inotify
+    os.write(write_fd, event(1, IN_CLOSE_WRITE, 'a.vdf') + event(2, IN_DELETE, 'b.VDF') +
+             event(1, IN_CLOSE_WRITE, 'notes.txt') + event(9, IN_CLOSE_WRITE, 'unknown.vdf') +
+             event(1, IN_CREATE | IN_ISDIR, 'sub'))
+    assert read_inotify_changes(inotify, 0) == {'/w/folder1/a.vdf', '/w/folder2/b.VDF'}
+    assert added == ['/w/folder1/sub']
+    assert read_inotify_changes(inotify, 0) == set()
+
+
+@pytest.mark.parametrize('events', [
+    # 事件队列溢出：wd为-1，没有文件名
+    [event(-1, IN_Q_OVERFLOW)],
+    [event(1, IN_CLOSE_WRITE, 'a.vdf'), event(-1, IN_Q_OVERFLOW)],
+    # 子文件夹整体移入或移出
+    [event(1, IN_MOVED_FROM | IN_ISDIR, 'sub')],
+    [event(2, IN_MOVED_TO | IN_ISDIR, 'sub')],
+])
+def test_lost_events_request_a_rescan(fake_inotify, events):
+    inotify, write_fd, added = fake_inotify
+    os.write(write_fd, b''.join(events))
+    assert read_inotify_changes(inotify, 0) is None
@@ -0,0 +1,85 @@
+"""VDF配置文件合并工具
+
+核心的解析/合并函数直接导入；文件夹批量合并、监视模式等在首次访问时才加载，
+以减少命令行和脚本调用时的启动开销。
+"""
+from .core import (
+    build_merged_line,
+    diff_vdf_data,
+    generate_vdf_content,
+    get_key_occurrence,
+    merge_values_by_count,
+    merge_vdf_data,
+    merge_vdf_three_way,
+    parse_vdf_content,
+    read_vdf_file,
+    save_vdf_file,
+)
+
+# 延迟加载：名称 -> 所在子模块
+_LAZY_ATTRIBUTES = {
+    'apply_overrides': 'sweep',
+    'batch_merge_archives': 'archives',
+    'batch_merge_folders': 'folders',
+    'clone_file': 'folders',
+    'compile_schema': 'schema',
+    'create_similarity_index': 'similarity',
+    'create_merge_queue': 'shards',
+    'expand_sweep_grid': 'sweep',
+    'export_lut_npz': 'export',
+    'export_vdf_tree': 'export',
+    'file_digest': 'folders',
+    'files_identical': 'folders',
+    'estimate_memory': 'corpus',
+    'find_variant_groups': 'folders',
+    'find_vdf_files': 'folders',
+    'iter_sweep': 'sweep',
+    'intern_document': 'corpus',
+    'load_corpus': 'corpus',
+    'load_lut_npz': 'export',
+    'load_schema': 'schema',
+    'load_similarity_index': 'similarity',
+    'merge_file_pair': 'folders',
+    'merge_parsed_pair': 'folders',
+    'merge_queue_status': 'shards',
+    'merge_vdf_folders': 'folders',
+    'query_similar': 'similarity',
+    'run_shard_worker': 'shards',
+    'run_sharded_merge': 'shards',
+    'save_similarity_index': 'similarity',
+    'three_way_merge_files': 'folders',
+    'update_similarity_index': 'similarity',
+    'validate_vdf_data': 'schema',
+    'validate_vdf_files': 'schema',
+    'watch_merge_folders': 'watch',
+    'write_sweep': 'sweep',
+}
+
+# 只包含核心函数：from vdfmerge import * 不会触发子模块的加载，延迟加载的名称需显式导入
+__all__ = [
+    'build_merged_line',
+    'diff_vdf_data',
+    'generate_vdf_content',
+    'get_key_occurrence',
+    'merge_values_by_count',
+    'merge_vdf_data',
+    'merge_vdf_three_way',
+    'parse_vdf_content',
+    'read_vdf_file',
+    'save_vdf_file',
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    module = importlib.import_module('.' + module_name, __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
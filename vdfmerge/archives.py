@@ -0,0 +1,277 @@
+"""直接从zip/tar压缩包读取vdf进行批量合并，结果可写回新的压缩包，不解压到磁盘
+
+输入、输出都可以是文件夹或压缩包（.zip、.tar、.tar.gz/.tgz、.tar.bz2、.tar.xz）。
+涉及压缩包时按相对路径匹配文件（所有vdf都在同一个顶层目录下时去掉该目录，
+使1.zip中的1/config1.vdf与2.zip中的2/config1.vdf匹配），输出也保持相对路径。
+
+zip按需逐个读取成员；tar只能顺序读取：打开时流式读一遍成员名（不读内容），合并时按tar中的顺序
+再顺序读取内容。越过的成员之后还要用时放入缓冲区（总大小不超过TAR_BUFFER_BYTES），
+超出时不缓冲，需要时重新从头读。两个输入都是tar且成员顺序相同时缓冲区始终为空。
+"""
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from .core import generate_vdf_content, parse_vdf_content
+from .folders import clone_file, find_vdf_files, merge_pair_list, order_with_variants, print_merge_summary
+
+# 输出路径按扩展名决定格式：扩展名 -> tarfile写入模式（zip为None）
+ARCHIVE_WRITE_MODES = {
+    '.zip': None,
+    '.tar': 'w',
+    '.tar.gz': 'w:gz',
+    '.tgz': 'w:gz',
+    '.tar.bz2': 'w:bz2',
+    '.tar.xz': 'w:xz',
+}
+
+# tar输入中越过、之后还要读取的成员最多缓冲的总字节数
+TAR_BUFFER_BYTES = 64 * 1024 * 1024
+
+
+def archive_write_mode(path):
+    """返回输出路径对应的格式：'zip'、tarfile写入模式，或None（文件夹）"""
+    lower_path = path.lower()
+    for suffix, mode in ARCHIVE_WRITE_MODES.items():
+        if lower_path.endswith(suffix):
+            return mode or 'zip'
+    return None
+
+
+def is_archive(path):
+    """输入路径是否为zip/tar压缩包（按内容判断）"""
+    return os.path.isfile(path) and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+
+def strip_common_root(names):
+    """所有名称都位于同一个顶层目录下时去掉该目录，返回{匹配用的相对路径: 原名称}"""
+    top_dirs = {name.split('/', 1)[0] for name in names}
+    if len(top_dirs) == 1 and all('/' in name for name in names):
+        return {name.split('/', 1)[1]: name for name in names}
+    return {name: name for name in names}
+
+
+def open_vdf_source(path):
+    """打开输入（文件夹或压缩包），返回{'path', 'kind', 'members': {相对路径: 成员}, 'handle'}
+
+    文件夹的成员为文件路径，zip为ZipInfo，tar为成员名（内容由read_member_bytes顺序读取）。
+    """
+    if os.path.isdir(path):
+        members = {os.path.relpath(file_path, path).replace(os.sep, '/'): file_path
+                   for file_path in find_vdf_files(path)}
+        return {'path': path, 'kind': 'folder', 'members': members, 'handle': None}
+
+    if zipfile.is_zipfile(path):
+        handle = zipfile.ZipFile(path)
+        infos = {info.filename: info for info in handle.infolist()
+                 if not info.is_dir() and info.filename.lower().endswith('.vdf')}
+        members = {key: infos[name] for key, name in strip_common_root(list(infos)).items()}
+        return {'path': path, 'kind': 'zip', 'members': members, 'handle': handle}
+
+    if tarfile.is_tarfile(path):
+        # 成员名 -> 在.vdf成员中的序号；同名成员出现多次时以最后一个为准
+        positions = {}
+        with tarfile.open(path, 'r|*') as tar:
+            for index, member in enumerate(iter_vdf_members(tar)):
+                positions[tar_member_name(member)] = index
+        members = strip_common_root(list(positions))
+        return {'path': path, 'kind': 'tar', 'members': members, 'handle': None, 'stream': None, 'index': 0,
+                'positions': positions, 'keys': {name: key for key, name in members.items()},
+                'wanted': set(members), 'buffer': {}, 'buffered_bytes': 0}
+
+    raise IOError(f"Not a folder or zip/tar archive: {path}")
+
+
+def iter_vdf_members(tar):
+    return (member for member in tar if member.isfile() and member.name.lower().endswith('.vdf'))
+
+
+def tar_member_name(member):
+    return member.name[2:] if member.name.startswith('./') else member.name
+
+
+def member_order(source, key):
+    """成员在输入中的读取顺序：tar为在流中的位置，其他按相对路径"""
+    if source['kind'] == 'tar':
+        return source['positions'][source['members'][key]]
+    return key
+
+
+def read_tar_member(source, key):
+    """顺序读取tar成员（见模块说明）；source['wanted']为之后还要读取的成员，只缓冲其中的"""
+    source['wanted'].discard(key)
+    data = source['buffer'].pop(key, None)
+    if data is not None:
+        source['buffered_bytes'] -= len(data)
+        return data
+    target = source['positions'][source['members'][key]]
+    if source['handle'] is None or source['index'] > target:
+        # 已经越过且没有缓冲：重新从头读
+        close_vdf_io(source)
+        source['handle'] = tarfile.open(source['path'], 'r|*')
+        source['stream'] = iter_vdf_members(source['handle'])
+        source['index'] = 0
+    for member in source['stream']:
+        index = source['index']
+        source['index'] += 1
+        name = tar_member_name(member)
+        if index == target:
+            return source['handle'].extractfile(member).read()
+        other_key = source['keys'][name]
+        if source['positions'][name] == index and other_key in source['wanted'] and \
+                other_key not in source['buffer'] and source['buffered_bytes'] + member.size <= TAR_BUFFER_BYTES:
+            source['buffer'][other_key] = source['handle'].extractfile(member).read()
+            source['buffered_bytes'] += member.size
+    raise IOError(f"{source['path']}: member {key} not found")
+
+
+def read_member_bytes(source, key):
+    member = source['members'][key]
+    if source['kind'] == 'folder':
+        with open(member, 'rb') as f:
+            return f.read()
+    if source['kind'] == 'zip':
+        return source['handle'].read(member)
+    return read_tar_member(source, key)
+
+
+def member_display_name(source, key):
+    if source['kind'] == 'folder':
+        return source['members'][key]
+    return f"{source['path']}:{key}"
+
+
+def parse_member(source, key, data, base_parsed=None):
+    """解析已读入的成员内容（与read_vdf_file一样保留原始换行符）"""
+    return parse_vdf_content(data.decode('utf-8'), member_display_name(source, key), base_parsed=base_parsed)
+
+
+def open_vdf_sink(path):
+    """打开输出（文件夹或新的压缩包），返回{'path', 'kind', 'handle'}"""
+    mode = archive_write_mode(path)
+    output_dir = os.path.dirname(path) if mode else path
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if mode is None:
+        return {'path': path, 'kind': 'folder', 'handle': None}
+    if mode == 'zip':
+        return {'path': path, 'kind': 'zip', 'handle': zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)}
+    return {'path': path, 'kind': 'tar', 'handle': tarfile.open(path, mode)}
+
+
+def write_member(sink, key, data):
+    """把内容（bytes）写入输出的相对路径key"""
+    if sink['kind'] == 'folder':
+        output_path = os.path.join(sink['path'], *key.split('/'))
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # 输出文件若是硬链接，先断开，避免写入时修改到源文件
+        if os.path.exists(output_path) and os.stat(output_path).st_nlink > 1:
+            os.remove(output_path)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+    elif sink['kind'] == 'zip':
+        sink['handle'].writestr(zipfile.ZipInfo(key, time.localtime()[:6]), data, zipfile.ZIP_DEFLATED)
+    else:
+        info = tarfile.TarInfo(key)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        sink['handle'].addfile(info, io.BytesIO(data))
+
+
+def copy_member(source, key, sink, data=None, hardlink=False):
+    """原样复制一个成员，返回复制方式
+
+    文件夹到文件夹时使用clone_file（hardlink=True时优先硬链接，否则支持时为reflink）；
+    其余情况写入内容，data为已读入的内容时不再重新读取。
+    """
+    if source['kind'] == 'folder' and sink['kind'] == 'folder':
+        output_path = os.path.join(sink['path'], *key.split('/'))
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return clone_file(source['members'][key], output_path, hardlink=hardlink)
+    write_member(sink, key, read_member_bytes(source, key) if data is None else data)
+    return 'copy'
+
+
+def close_vdf_io(item):
+    if item['handle'] is not None:
+        item['handle'].close()
+        item['handle'] = None
+
+
+def batch_merge_archives(input1_path, input2_path, output_path, schema=None, variants=None, link_identical=False):
+    """批量合并两个输入（文件夹或压缩包），输出到文件夹或压缩包（见模块说明）
+
+    规则与batch_merge_folders相同：共有的文件合并，内容相同的文件对直接复制input1，
+    只在input1中的文件原样复制，只在input2中的文件丢弃。返回值也与batch_merge_folders相同。
+    link_identical只在input1和输出都是文件夹时有效（压缩包成员无法硬链接）。
+    """
+    source1 = open_vdf_source(input1_path)
+    source2 = open_vdf_source(input2_path)
+    sink = None
+    try:
+        common_files = set(source1['members']) & set(source2['members'])
+        print(f"Found {len(source1['members'])} VDF files in {input1_path}")
+        print(f"Found {len(source2['members'])} VDF files in {input2_path}")
+        print(f"Found {len(common_files)} common VDF files to merge")
+
+        # input2中只会读取共有的文件；有tar输入时按tar中的顺序合并（优先input1），尽量不缓冲
+        if source2['kind'] == 'tar':
+            source2['wanted'] = set(common_files)
+        order_source = source2 if source1['kind'] != 'tar' and source2['kind'] == 'tar' else source1
+
+        sink = open_vdf_sink(output_path)
+        if link_identical and not (source1['kind'] == 'folder' and sink['kind'] == 'folder'):
+            print("⚠ link_identical ignored: hardlinks need a folder input1 and a folder output")
+        violations = []
+
+        if variants:
+            merge_order, variant_groups = order_with_variants(common_files, variants)
+        else:
+            merge_order = [(key, None) for key in sorted(common_files, key=lambda k: member_order(order_source, k))]
+            variant_groups = {}
+
+        # 当前文件对的内容，每个成员只读取一次
+        current = {}
+
+        def start(key):
+            print(f"\n=== Merging {key} ===")
+            current.clear()
+            current.update({1: read_member_bytes(source1, key), 2: read_member_bytes(source2, key)})
+
+        def copy_identical(key):
+            if current[1] != current[2]:
+                return None
+            return copy_member(source1, key, sink, data=current[1], hardlink=link_identical)
+
+        def parse(key, side, base_parsed):
+            return parse_member(source1 if side == 1 else source2, key, current[side], base_parsed=base_parsed)
+
+        def save(key, merged_parsed):
+            write_member(sink, key, generate_vdf_content(merged_parsed).encode('utf-8'))
+
+        pair_io = {'start': start, 'copy_identical': copy_identical, 'parse': parse, 'save': save,
+                   'output_name': lambda key: f"{output_path}:{key}", 'source1': input1_path}
+        merged_count, skipped_count, identical_count = merge_pair_list(merge_order, variant_groups, pair_io,
+                                                                       schema=schema, violations=violations)
+
+        unique_to_input1 = set(source1['members']) - set(source2['members'])
+        for key in sorted(unique_to_input1, key=lambda k: member_order(source1, k)):
+            try:
+                method = copy_member(source1, key, sink)
+                print(f"✓ Copied unique file from {input1_path} ({method}): {key}")
+                merged_count += 1
+            except Exception as e:
+                print(f"✗ Failed to copy {key}: {e}")
+                skipped_count += 1
+    finally:
+        for item in (source1, source2, sink):
+            if item is not None:
+                close_vdf_io(item)
+
+    report = {'files': len(common_files) + len(unique_to_input1), 'merged': merged_count,
+              'identical': identical_count, 'skipped': skipped_count, 'violations': violations}
+    print_merge_summary(report, schema, f"Output: {output_path}")
+    return report
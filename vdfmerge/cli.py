@@ -0,0 +1,297 @@
+"""命令行入口：vdfmerge merge / diff / patch / validate / sweep / export / queue / similar"""
+import argparse
+import os
+import sys
+
+
+def format_change(change):
+    location = f"[{change['section']}]"
+    if change['key'] is None:
+        marker = {'added': '+', 'removed': '-'}[change['change']]
+        return f"{marker} {location}"
+    location = f"{location} {change['key']}"
+    if change['change'] == 'added':
+        return f"+ {location} = {change['new']}"
+    if change['change'] == 'removed':
+        return f"- {location} = {change['old']}"
+    return f"~ {location}: {change['old']} -> {change['new']}"
+
+
+def is_archive_input(path):
+    """只有既不是文件夹、也不以.vdf结尾的输入才按内容判断是否为压缩包（此时才导入archives）"""
+    if os.path.isdir(path) or path.lower().endswith('.vdf'):
+        return False
+    from .archives import is_archive
+    return is_archive(path)
+
+
+def run_merge(args):
+    schema = None
+    if args.schema:
+        from .schema import load_schema
+        schema = load_schema(args.schema)
+
+    archive_inputs = [path for path in (args.vdf1, args.vdf2) if is_archive_input(path)]
+
+    if os.path.isfile(args.vdf1) and not archive_inputs:
+        from .folders import merge_file_pair
+        identical_method = merge_file_pair(args.vdf1, args.vdf2, args.output, link_identical=args.link_identical,
+                                           schema=schema)
+        if identical_method:
+            print(f"✓ Identical files, {identical_method} from {args.vdf1}")
+        else:
+            print(f"✓ Merged into {args.output}")
+        return 0
+
+    for folder in (args.vdf1, args.vdf2):
+        if not os.path.isdir(folder) and folder not in archive_inputs:
+            print(f"Error: Folder '{folder}' does not exist!", file=sys.stderr)
+            return 2
+
+    variants = None
+    if args.variant:
+        variants = dict(item.split('=', 1) for item in args.variant)
+    elif args.variants:
+        variants = 'auto'
+    max_inflight_bytes = int(args.max_inflight_mb * 1e6) if args.max_inflight_mb else None
+
+    if args.watch:
+        if archive_inputs:
+            print("Error: --watch needs folders, not archives", file=sys.stderr)
+            return 2
+        from .watch import watch_merge_folders
+        watch_merge_folders(args.vdf1, args.vdf2, args.output, debounce=args.debounce, use_inotify=not args.poll,
+                            link_identical=args.link_identical, schema=schema, variants=variants,
+                            workers=args.workers, max_inflight_bytes=max_inflight_bytes)
+    else:
+        from .folders import batch_merge_folders
+        batch_merge_folders(args.vdf1, args.vdf2, args.output, link_identical=args.link_identical, schema=schema,
+                            variants=variants, workers=args.workers, max_inflight_bytes=max_inflight_bytes)
+    return 0
+
+
+def run_diff(args):
+    from .core import diff_vdf_data, read_vdf_file
+    changes = diff_vdf_data(read_vdf_file(args.vdf1), read_vdf_file(args.vdf2))
+    for change in changes:
+        print(format_change(change))
+    return 1 if changes else 0
+
+
+def run_patch(args):
+    from .folders import three_way_merge_files
+    output = args.output or args.target
+    conflicts = three_way_merge_files(args.base, args.target, args.new, output)
+    return 1 if conflicts else 0
+
+
+def run_validate(args):
+    from .schema import format_violation, load_schema, validate_vdf_files
+    violations = validate_vdf_files(args.paths, load_schema(args.schema))
+    for violation in violations:
+        print(format_violation(violation))
+    return 1 if violations else 0
+
+
+def run_sweep(args):
+    from .core import read_vdf_file
+    from .sweep import format_sweep_value, load_sweep_spec, write_sweep
+    written = write_sweep(read_vdf_file(args.baseline), load_sweep_spec(args.spec), args.output)
+    for output_path, overrides in written:
+        settings = ', '.join(f"[{section}] {key}={format_sweep_value(value)}"
+                             for (section, key), value in overrides.items())
+        print(f"{output_path}\t{settings}")
+    return 0
+
+
+def run_export(args):
+    from .export import export_vdf_tree
+    stats = export_vdf_tree(args.paths, args.database, npz_path=args.npz, prune=not args.no_prune)
+    print(f"✓ Exported {stats['exported']} of {stats['files']} files to {args.database} "
+          f"({stats['unchanged']} unchanged, {stats['removed']} removed)")
+    return 0
+
+
+def run_queue(args):
+    from . import shards
+    if args.queue_command == 'work':
+        processed = shards.run_shard_worker(args.queue_dir, worker_id=args.worker_id, lease=args.lease)
+        print(f"✓ Queue drained, {processed} shards processed by this worker")
+        return 0
+    if args.queue_command == 'status':
+        status = shards.merge_queue_status(args.queue_dir)
+        shards.print_queue_status(status)
+        return 1 if status['counts']['failed'] or status['totals']['skipped'] else 0
+
+    queue_options = {'shard_bytes': int(args.shard_mb * 1e6), 'link_identical': args.link_identical,
+                     'schema_path': args.schema, 'variants': 'auto' if args.variants else None}
+    if args.queue_command == 'create':
+        shard_count = shards.create_merge_queue(args.vdf1, args.vdf2, args.output, args.queue_dir, **queue_options)
+        print(f"✓ Created {shard_count} shards in {args.queue_dir}")
+        return 0
+    status = shards.run_sharded_merge(args.vdf1, args.vdf2, args.output, args.queue_dir, workers=args.workers,
+                                      **queue_options)
+    return 1 if status['counts']['failed'] or status['totals']['skipped'] else 0
+
+
+def run_similar(args):
+    from .core import read_vdf_file
+    from . import similarity
+    if args.index and os.path.exists(args.index):
+        index = similarity.load_similarity_index(args.index)
+    else:
+        index = similarity.create_similarity_index()
+    if args.paths:
+        stats = similarity.update_similarity_index(index, args.paths)
+        if args.index:
+            similarity.save_similarity_index(index, args.index)
+        print(f"Indexed {len(index['documents'])} files ({stats['added']} added, {stats['updated']} updated, "
+              f"{stats['removed']} removed)", file=sys.stderr)
+    results = similarity.query_similar(index, read_vdf_file(args.draft), top_k=args.top,
+                                       numeric_weight=args.numeric_weight, exclude=os.path.abspath(args.draft))
+    for result in results:
+        print(f"{result['score']:.3f}\tjaccard={result['jaccard']:.3f}\tlut_distance={result['lut_distance']:.3f}"
+              f"\t{result['name']}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vdfmerge', description='Merge, diff, patch and validate VDF config files.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    merge_parser = subparsers.add_parser(
+        'merge', help='merge vdf2 into vdf1 (two files, or two folders / zip / tar archives)',
+        description='Merge vdf2 into vdf1. Sections and keys only in vdf2 are dropped; '
+                    'values are taken from vdf2 when the component counts match. Archives are read '
+                    'without extracting and matched by relative path; an output ending in .zip, .tar, '
+                    '.tar.gz, .tgz, .tar.bz2 or .tar.xz is written as a new archive.')
+    merge_parser.add_argument('vdf1', help='base file, folder or archive (folder "1")')
+    merge_parser.add_argument('vdf2', help='file, folder or archive with new values (folder "2")')
+    merge_parser.add_argument('output', help='output file, folder or archive')
+    merge_parser.add_argument('--link-identical', action='store_true',
+                              help='hardlink outputs of byte-identical pairs instead of copying')
+    merge_parser.add_argument('--watch', action='store_true',
+                              help='keep running and re-merge file pairs as they change (folders only)')
+    merge_parser.add_argument('--debounce', type=float, default=0.2,
+                              help='seconds to wait for further changes in watch mode (default: 0.2)')
+    merge_parser.add_argument('--poll', action='store_true', help='poll for changes instead of using inotify')
+    merge_parser.add_argument('--schema', help='validate vdf2 and merged values against this JSON schema')
+    merge_parser.add_argument('--variants', action='store_true',
+                              help='detect derived configs (config1_meta_128.vdf -> config1.vdf) and merge the '
+                                   'sections they share with their base only once')
+    merge_parser.add_argument('--variant', action='append', metavar='VARIANT=BASE',
+                              help='declare a derived config and its base (repeatable; implies --variants)')
+    merge_parser.add_argument('-j', '--workers', type=int,
+                              help='merge folders in this many processes, largest files first')
+    merge_parser.add_argument('--max-inflight-mb', type=float,
+                              help='with --workers, cap the total input size being merged at once (MB)')
+    merge_parser.set_defaults(func=run_merge)
+
+    diff_parser = subparsers.add_parser(
+        'diff', help='show key-level differences between two files',
+        description='Show added (+), removed (-) and changed (~) sections and keys. '
+                    'Exits with status 1 when the files differ.')
+    diff_parser.add_argument('vdf1')
+    diff_parser.add_argument('vdf2')
+    diff_parser.set_defaults(func=run_diff)
+
+    patch_parser = subparsers.add_parser(
+        'patch', help='apply the changes between BASE and NEW to TARGET (three-way merge)',
+        description='Apply the changes made from BASE to NEW onto TARGET. Conflicting keys keep '
+                    'the TARGET value and are reported; exits with status 1 on conflicts.')
+    patch_parser.add_argument('base', help='common ancestor')
+    patch_parser.add_argument('new', help='BASE with the changes to apply')
+    patch_parser.add_argument('target', help='file to apply the changes to')
+    patch_parser.add_argument('-o', '--output', help='output file (default: overwrite TARGET)')
+    patch_parser.set_defaults(func=run_patch)
+
+    validate_parser = subparsers.add_parser(
+        'validate', help='check value lengths, types and ranges against a JSON schema',
+        description='Validate files or folders (searched recursively) against a JSON schema. '
+                    'Exits with status 1 when violations are found.')
+    validate_parser.add_argument('schema', help='JSON schema file')
+    validate_parser.add_argument('paths', nargs='+', help='vdf files or folders')
+    validate_parser.set_defaults(func=run_validate)
+
+    sweep_parser = subparsers.add_parser(
+        'sweep', help='generate variants of one baseline from a grid or list of key overrides',
+        description='Parse BASELINE once and write one file per override set in SPEC. SPEC is JSON: '
+                    '{"grid": {"SECTION": {"KEY": [values...]}}} and/or '
+                    '{"variants": [{"SECTION": {"KEY": value}}, ...]}.')
+    sweep_parser.add_argument('baseline', help='baseline vdf file')
+    sweep_parser.add_argument('spec', help='JSON sweep specification')
+    sweep_parser.add_argument('-o', '--output', required=True,
+                              help='output path pattern, e.g. "sweep/config1_{index:04d}.vdf"')
+    sweep_parser.set_defaults(func=run_sweep)
+
+    export_parser = subparsers.add_parser(
+        'export', help='export files or folders to a SQLite database (and optionally numeric LUTs to .npz)',
+        description='Load vdf files into DATABASE (tables files, sections, keys, comments; numeric LUTs are '
+                    'stored as float64 BLOBs in keys.lut). Re-exporting only rewrites files whose content changed.')
+    export_parser.add_argument('database', help='SQLite database file (created if missing)')
+    export_parser.add_argument('paths', nargs='+', help='vdf files or folders')
+    export_parser.add_argument('--npz', help='also write numeric LUTs to this .npz file (requires NumPy)')
+    export_parser.add_argument('--no-prune', action='store_true',
+                               help='keep database rows of files that no longer exist in the exported folders')
+    export_parser.set_defaults(func=run_export)
+
+    queue_parser = subparsers.add_parser(
+        'queue', help='sharded folder merge through a work queue in a shared directory',
+        description='Split a folder merge into shards stored in QUEUE_DIR. Workers on any host that can see '
+                    'QUEUE_DIR and the folders claim shards, merge them and record the results; shards of '
+                    'crashed workers are retried.')
+    queue_subparsers = queue_parser.add_subparsers(dest='queue_command', required=True)
+    for name, help_text in (('create', 'create the queue'),
+                            ('run', 'create the queue if needed and drain it with local worker processes')):
+        command_parser = queue_subparsers.add_parser(name, help=help_text)
+        command_parser.add_argument('vdf1', help='base folder (folder "1")')
+        command_parser.add_argument('vdf2', help='folder with new values (folder "2")')
+        command_parser.add_argument('output', help='output folder')
+        command_parser.add_argument('queue_dir', help='shared queue directory')
+        command_parser.add_argument('--shard-mb', type=float, default=64,
+                                    help='target input size per shard in MB (default: 64)')
+        command_parser.add_argument('--link-identical', action='store_true',
+                                    help='hardlink outputs of byte-identical pairs instead of copying')
+        command_parser.add_argument('--schema', help='validate vdf2 and merged values against this JSON schema')
+        command_parser.add_argument('--variants', action='store_true',
+                                    help='keep derived configs in the shard of their base and merge shared '
+                                         'sections once')
+        if name == 'run':
+            command_parser.add_argument('-j', '--workers', type=int, default=2,
+                                        help='number of local worker processes (default: 2)')
+    work_parser = queue_subparsers.add_parser('work', help='claim and merge shards until the queue is drained')
+    work_parser.add_argument('queue_dir', help='shared queue directory')
+    work_parser.add_argument('--worker-id', help='name recorded for this worker (default: HOST-PID)')
+    work_parser.add_argument('--lease', type=float, default=120.0,
+                             help='seconds without heartbeat before a running shard is retried (default: 120)')
+    status_parser = queue_subparsers.add_parser('status', help='show shard states and merged totals')
+    status_parser.add_argument('queue_dir', help='shared queue directory')
+    queue_parser.set_defaults(func=run_queue)
+
+    similar_parser = subparsers.add_parser(
+        'similar', help='find the existing configs closest to a draft',
+        description='Rank indexed files by MinHash similarity of their (section, key, value) content and by '
+                    'the distance between their numeric LUTs. With --index the index is loaded from and saved '
+                    'to that file, and PATHS are added incrementally.')
+    similar_parser.add_argument('draft', help='draft vdf file to match')
+    similar_parser.add_argument('paths', nargs='*', help='vdf files or folders to index')
+    similar_parser.add_argument('--index', help='JSON index file to load and update')
+    similar_parser.add_argument('-k', '--top', type=int, default=5, help='number of results (default: 5)')
+    similar_parser.add_argument('--numeric-weight', type=float, default=0.5,
+                                help='weight of the LUT distance in the score, 0..1 (default: 0.5)')
+    similar_parser.set_defaults(func=run_similar)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (IOError, OSError, ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
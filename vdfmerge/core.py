@@ -0,0 +1,990 @@
+"""VDF文件的解析、生成与合并（不涉及文件夹遍历）"""
+import os
+
+
+def read_vdf_file(file_path, base_parsed=None):
+    if not os.path.exists(file_path):
+        raise IOError("File not found: " + str(file_path))
+
+    # newline=''：保留原始换行符（CRLF），保存未修改的章节时可原样写回
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        content = f.read()
+
+    return parse_vdf_content(content, file_path, base_parsed=base_parsed)
+
+
+def find_shared_sections(lines, content, base_parsed):
+    """找出与base_parsed原文完全相同的章节块，返回{章节行下标: (章节名, 下一章节行下标, 结束偏移)}
+
+    只复用在两个文件中都只出现一次、且base中没有重复键的章节。
+    """
+    base_source = base_parsed.get('source')
+    if base_source is None:
+        return {}
+    base_spans = {}
+    for block in base_parsed.get('section_blocks') or []:
+        # 出现多次的章节不复用
+        base_spans[block[0]] = None if block[0] in base_spans else (block[2], block[3])
+    base_duplicate_keys = base_parsed.get('duplicate_keys', {})
+
+    headers = []
+    offset = 0
+    for i, line in enumerate(lines):
+        stripped_line = line.strip()
+        if stripped_line.startswith('[') and stripped_line.endswith(']'):
+            headers.append((i, offset, stripped_line[1:-1].strip()))
+        offset += len(line) + 1
+
+    name_counts = {}
+    for _, _, name in headers:
+        name_counts[name] = name_counts.get(name, 0) + 1
+
+    shared = {}
+    for index, (line_index, start, name) in enumerate(headers):
+        span = base_spans.get(name)
+        if span is None or name_counts[name] > 1 or name in base_duplicate_keys:
+            continue
+        if index + 1 < len(headers):
+            next_line_index, end = headers[index + 1][0], headers[index + 1][1]
+        else:
+            next_line_index, end = len(lines), len(content)
+        # 文件末尾的章节块多一个空行（最后一个换行符之后），只与同样位于末尾的块比较
+        if (end == len(content)) != (span[1] == len(base_source)):
+            continue
+        if end - start == span[1] - span[0] and content[start:end] == base_source[span[0]:span[1]]:
+            shared[line_index] = (name, next_line_index, end)
+    return shared
+
+
+def parse_vdf_content(content, file_name="unknown", base_parsed=None):
+    """解析vdf文本
+
+    base_parsed为同类文件（如派生配置config1_meta_128.vdf的基础配置config1.vdf）的解析结果时，
+    原文与base完全相同的章节不再逐行解析，直接共享base中该章节的解析结果（只读，不可修改）。
+    """
+    result = {}
+    section_order = []
+    key_order = {}
+    line_comments = {}
+    original_key_value_lines = {}  # 存储每个键的完整原始行（包括注释）
+    key_value_spacing = {}  # 存储每个键值对等号前后的空格信息
+    comment_spacing = {}  # 存储数值与分号之间的空格信息
+
+    section_content = {}
+    section_key_value_lines = {}
+    section_non_key_value_lines = {}
+
+    standalone_comments = []
+
+    # 重复章节/重复键：按文件顺序保留每一次出现
+    section_blocks = []  # [章节名, 行数, 起始偏移, 结束偏移]，按文件中出现的顺序记录每个章节块
+    duplicate_keys = {}  # 出现多次的键 -> 每次出现的记录列表
+    warnings = []
+    section_first_line = {}
+    key_first_line = {}
+
+    current_section = None
+    current_section_lines = []
+    current_block = None
+
+    lines = content.split('\n')
+    shared = find_shared_sections(lines, content, base_parsed) if base_parsed is not None else {}
+    shared_sections = set()
+
+    line_start = 0
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        line_number = i + 1
+        line_offset = line_start
+
+        if i in shared:
+            # 与base完全相同的章节：共享base的解析结果，跳过整个章节块
+            section_name, next_index, end = shared[i]
+            result[section_name] = base_parsed['data'][section_name]
+            key_order[section_name] = base_parsed['key_order'][section_name]
+            section_order.append(section_name)
+            original_key_value_lines[section_name] = base_parsed['original_key_value_lines'][section_name]
+            line_comments[section_name] = base_parsed['line_comments'][section_name]
+            key_value_spacing[section_name] = base_parsed['key_value_spacing'][section_name]
+            comment_spacing[section_name] = base_parsed['comment_spacing'][section_name]
+            section_content[section_name] = base_parsed['section_content'][section_name]
+            section_key_value_lines[section_name] = base_parsed['section_key_value_lines'][section_name]
+            section_non_key_value_lines[section_name] = base_parsed['section_non_key_value_lines'][section_name]
+            shared_sections.add(section_name)
+
+            if current_block is not None:
+                current_block[3] = line_offset
+            current_block = [section_name, next_index - i, line_offset, end]
+            section_blocks.append(current_block)
+            current_section = section_name
+            i = next_index
+            line_start = end
+            continue
+
+        original_line = line.rstrip('\r\n')
+        stripped_line = line.strip()
+        line_start += len(line) + 1
+        i += 1
+
+        if stripped_line.startswith('[') and stripped_line.endswith(']'):
+            section_name = stripped_line[1:-1].strip()
+            current_section = section_name
+
+            if section_name not in result:
+                result[section_name] = {}
+                key_order[section_name] = []
+                section_order.append(section_name)
+                original_key_value_lines[section_name] = {}
+                line_comments[section_name] = {}
+                key_value_spacing[section_name] = {}
+                comment_spacing[section_name] = {}
+                section_content[section_name] = []
+                key_first_line[section_name] = {}
+                section_first_line[section_name] = line_number
+            else:
+                # 重复章节：内容追加到同一章节，不再覆盖前一个块
+                warnings.append("Duplicate section [%s] at line %d (first defined at line %d)"
+                                % (section_name, line_number, section_first_line[section_name]))
+
+            current_section_lines = section_content[section_name]
+            current_section_lines.append(original_line)
+            if current_block is not None:
+                current_block[3] = line_offset
+            current_block = [section_name, 1, line_offset, len(content)]
+            section_blocks.append(current_block)
+            continue
+
+        if current_section is None:
+            standalone_comments.append(original_line)
+            continue
+
+        current_section_lines.append(original_line)
+        current_block[1] += 1
+
+        if '=' in original_line and not stripped_line.startswith(';'):
+            # 解析键值对，完全保持原有的格式
+            key = extract_key_from_line(original_line)
+            if key:
+                value = extract_value_from_line(original_line)
+                comment = extract_comment_from_line(original_line)
+                spacing_info = extract_spacing_info(original_line)
+                comment_space_info = extract_comment_spacing_info(original_line)
+
+                section_data = result[current_section]
+                if key in section_data:
+                    # 重复键：记录所有出现，生效值为最后一次出现
+                    occurrences = duplicate_keys.setdefault(current_section, {}).get(key)
+                    if occurrences is None:
+                        occurrences = [{
+                            'value': section_data[key],
+                            'comment': line_comments[current_section][key],
+                            'original_line': original_key_value_lines[current_section][key],
+                            'spacing': key_value_spacing[current_section][key],
+                            'comment_spacing': comment_spacing[current_section][key],
+                        }]
+                        duplicate_keys[current_section][key] = occurrences
+                    occurrences.append({
+                        'value': value,
+                        'comment': comment,
+                        'original_line': original_line,
+                        'spacing': spacing_info,
+                        'comment_spacing': comment_space_info,
+                    })
+                    warnings.append("Duplicate key '%s' in [%s] at line %d (first defined at line %d)"
+                                    % (key, current_section, line_number,
+                                       key_first_line[current_section][key]))
+                else:
+                    key_order[current_section].append(key)
+                    key_first_line[current_section][key] = line_number
+
+                section_data[key] = value
+
+                # 存储完整的原始行（包括所有空格和注释）
+                original_key_value_lines[current_section][key] = original_line
+                # 存储注释
+                line_comments[current_section][key] = comment
+                # 存储等号前后的空格信息
+                key_value_spacing[current_section][key] = spacing_info
+                # 存储注释前的空格信息
+                comment_spacing[current_section][key] = comment_space_info
+
+    for section in section_order:
+        if section in shared_sections:
+            continue
+        kv_lines, non_kv_lines = separate_key_value_lines(section_content[section])
+        section_key_value_lines[section] = kv_lines
+        section_non_key_value_lines[section] = non_kv_lines
+
+    first_newline = content.find('\n')
+    newline = '\r\n' if first_newline > 0 and content[first_newline - 1] == '\r' else '\n'
+
+    return {
+        'data': result,
+        'section_order': section_order,
+        'key_order': key_order,
+        'line_comments': line_comments,
+        'section_content': section_content,
+        'section_key_value_lines': section_key_value_lines,
+        'section_non_key_value_lines': section_non_key_value_lines,
+        'standalone_comments': standalone_comments,
+        'original_key_value_lines': original_key_value_lines,  # 存储完整的原始行
+        'key_value_spacing': key_value_spacing,  # 存储等号前后的空格信息
+        'comment_spacing': comment_spacing,  # 存储注释前的空格信息
+        'section_blocks': section_blocks,  # 章节块的原始顺序（含重复章节）
+        'source': content,  # 原始文本，未修改的章节按偏移直接切片输出
+        'preamble_end': section_blocks[0][2] if section_blocks else len(content),
+        'verbatim_sections': set(section_order),  # 可原样输出的章节；修改section_content时需移除对应章节
+        'newline': newline,
+        'duplicate_keys': duplicate_keys,  # 重复键的每次出现
+        'warnings': warnings,
+        'shared_sections': shared_sections,  # 与base_parsed共享解析结果的章节
+        'file_name': file_name
+    }
+
+
+def separate_key_value_lines(lines):
+    kv_lines = []
+    non_kv_lines = []
+    for line in lines:
+        stripped = line.strip()
+        if '=' in line and not stripped.startswith(';'):
+            kv_lines.append(line)
+        else:
+            non_kv_lines.append(line)
+    return kv_lines, non_kv_lines
+
+
+def is_key_value_line(line):
+    if not line:
+        return False
+    stripped = line.strip()
+    return '=' in line and not stripped.startswith(';')
+
+
+def is_section_line(line):
+    """判断是否为章节行"""
+    stripped = line.strip()
+    return stripped.startswith('[') and stripped.endswith(']')
+
+
+def extract_section_name(line):
+    """提取章节名"""
+    stripped = line.strip()
+    if stripped.startswith('[') and stripped.endswith(']'):
+        return stripped[1:-1].strip()
+    return None
+
+
+def extract_key_from_line(line):
+    """提取键名，不改变原始格式"""
+    if not line or '=' not in line:
+        return None
+
+    # 分离注释部分
+    if ';' in line:
+        main_part = line.split(';', 1)[0]
+    else:
+        main_part = line
+
+    if '=' in main_part:
+        key_part = main_part.split('=', 1)[0]
+        return key_part.strip()
+    return None
+
+
+def extract_value_from_line(line):
+    """提取值，不改变原始格式"""
+    if not line or '=' not in line:
+        return None
+
+    # 分离注释部分
+    if ';' in line:
+        main_part = line.split(';', 1)[0]
+    else:
+        main_part = line
+
+    if '=' in main_part:
+        value_part = main_part.split('=', 1)[1]
+        return value_part.strip()
+    return None
+
+
+def extract_comment_from_line(line):
+    """提取注释内容（不含分号）"""
+    if ';' in line:
+        comment_part = line.split(';', 1)[1]
+        # 返回注释内容（不含分号，但保留注释内容前后的空格）
+        return comment_part
+    return ''
+
+
+def extract_spacing_info(line):
+    """提取等号前后的空格信息"""
+    if ';' in line:
+        main_part = line.split(';', 1)[0]
+    else:
+        main_part = line
+
+    if '=' in main_part:
+        key_part, value_part = main_part.split('=', 1)
+
+        # 计算等号前的空格（键和等号之间）
+        before_equals_spaces = len(key_part) - len(key_part.rstrip())
+
+        # 计算等号后的空格（等号和值之间）
+        after_equals_spaces = len(value_part) - len(value_part.lstrip())
+
+        return {
+            'before_equals': before_equals_spaces,
+            'after_equals': after_equals_spaces
+        }
+    return {'before_equals': 1, 'after_equals': 1}  # 默认值
+
+
+def extract_comment_spacing_info(line):
+    """提取数值与分号之间以及分号前后的空格信息"""
+    if ';' not in line:
+        return {'before_comment': 0, 'after_semicolon': 0}
+
+    # 分离主部分和注释部分
+    main_part, comment_part = line.split(';', 1)
+
+    # 计算数值与分号之间的空格
+    before_comment_spaces = len(main_part) - len(main_part.rstrip())
+
+    # 计算分号与注释内容之间的空格
+    after_semicolon_spaces = len(comment_part) - len(comment_part.lstrip())
+
+    return {
+        'before_comment': before_comment_spaces,
+        'after_semicolon': after_semicolon_spaces
+    }
+
+
+def replace_value_in_line(line, value):
+    """替换键值行中的值，键、等号前后空格、值与分号之间的空格以及注释保持不变"""
+    main_part, semicolon, comment_part = line.partition(';')
+    key_part, equals, value_part = main_part.partition('=')
+    stripped_value = value_part.strip()
+    if stripped_value:
+        leading = value_part[:len(value_part) - len(value_part.lstrip())]
+        trailing = value_part[len(value_part.rstrip()):]
+    else:
+        leading, trailing = value_part, ''
+    return key_part + equals + leading + value + trailing + semicolon + comment_part
+
+
+def create_merged_line_with_vdf2_spacing(key, value, v2_spacing_info, v2_comment_spacing_info, use_comment=None):
+    """使用vdf2的等号前后空格和分号前后空格格式"""
+    # 构建空格字符串
+    before_equals_spaces = ' ' * v2_spacing_info.get('before_equals', 1)
+    after_equals_spaces = ' ' * v2_spacing_info.get('after_equals', 1)
+    before_comment_spaces = ' ' * v2_comment_spacing_info.get('before_comment', 0)
+    after_semicolon_spaces = ' ' * v2_comment_spacing_info.get('after_semicolon', 1)
+
+    # 构建主部分
+    main_part = f"{key}{before_equals_spaces}={after_equals_spaces}{value}"
+
+    # 添加注释
+    if use_comment:
+        # 清理注释内容（移除可能的分号和前后空格）
+        clean_comment = use_comment.strip()
+        if clean_comment.startswith(';'):
+            clean_comment = clean_comment[1:].strip()
+
+        if clean_comment:
+            # 使用vdf2的分号前后空格格式
+            comment_part = f"{before_comment_spaces};{after_semicolon_spaces}{clean_comment}"
+            return main_part + comment_part
+        else:
+            # 如果注释内容为空，只保留分号和前面的空格（如果有的话）
+            if v2_comment_spacing_info.get('before_comment', 0) > 0:
+                return main_part + ' ' * v2_comment_spacing_info['before_comment'] + ';'
+            else:
+                return main_part
+    else:
+        # 没有注释
+        return main_part
+
+
+def create_merged_line_with_vdf1_comment_spacing(key, value, v2_spacing_info, v1_comment_spacing_info,
+                                                 use_comment=None):
+    """使用vdf2的等号前后空格，但使用vdf1的分号前后空格格式"""
+    # 构建空格字符串
+    before_equals_spaces = ' ' * v2_spacing_info.get('before_equals', 1)
+    after_equals_spaces = ' ' * v2_spacing_info.get('after_equals', 1)
+    before_comment_spaces = ' ' * v1_comment_spacing_info.get('before_comment', 0)
+    after_semicolon_spaces = ' ' * v1_comment_spacing_info.get('after_semicolon', 1)
+
+    # 构建主部分
+    main_part = f"{key}{before_equals_spaces}={after_equals_spaces}{value}"
+
+    # 添加注释
+    if use_comment:
+        # 清理注释内容（移除可能的分号和前后空格）
+        clean_comment = use_comment.strip()
+        if clean_comment.startswith(';'):
+            clean_comment = clean_comment[1:].strip()
+
+        if clean_comment:
+            # 使用vdf1的分号前后空格格式
+            comment_part = f"{before_comment_spaces};{after_semicolon_spaces}{clean_comment}"
+            return main_part + comment_part
+        else:
+            # 如果注释内容为空，只保留分号和前面的空格（如果有的话）
+            if v1_comment_spacing_info.get('before_comment', 0) > 0:
+                return main_part + ' ' * v1_comment_spacing_info['before_comment'] + ';'
+            else:
+                return main_part
+    else:
+        # 没有注释
+        return main_part
+
+
+def print_vdf_section_details(vdf_parsed, vdf_name):
+    print(f"\n=== {vdf_name} Details ===")
+    for section in vdf_parsed['section_order']:
+        print(f"\n[{section}]")
+        for line in vdf_parsed['section_content'][section]:
+            print(f"  {repr(line)}")  # 使用repr显示原始格式
+
+
+def generate_vdf_content(parsed_data):
+    """生成vdf文本
+
+    有原始文本（'source'）时，'verbatim_sections'中的章节和文件开头的独立注释按原始偏移直接切片输出，
+    保留原有换行符；其余章节按行拼接，使用原文件的换行符。
+    """
+    section_order = parsed_data['section_order']
+    section_content = parsed_data.get('section_content', {})
+    standalone_comments = parsed_data.get('standalone_comments', [])
+
+    section_blocks = parsed_data.get('section_blocks')
+    source = parsed_data.get('source')
+    verbatim_sections = parsed_data.get('verbatim_sections', ()) if source is not None else ()
+    newline = parsed_data.get('newline', '\n')
+
+    # 每个片段都以换行结尾，最后去掉末尾多出的一个换行，与按行'\n'.join的结果一致
+    chunks = []
+
+    def add_span(start, end):
+        text = source[start:end]
+        if end >= len(source) or not text.endswith('\n'):
+            # 原文件最后一行没有换行符
+            text += newline
+        chunks.append(text)
+
+    def add_lines(lines):
+        if lines:
+            chunks.append(newline.join(lines) + newline)
+
+    if standalone_comments:
+        if source is not None and parsed_data.get('preamble_end') is not None:
+            add_span(0, parsed_data['preamble_end'])
+        else:
+            add_lines(standalone_comments)
+
+    if section_blocks is not None:
+        # 按原始顺序输出每个章节块（重复章节保持原位置）
+        cursors = {}
+        for block in section_blocks:
+            section, line_count = block[0], block[1]
+            start = cursors.get(section, 0)
+            if section in verbatim_sections and len(block) > 2:
+                add_span(block[2], block[3])
+            else:
+                add_lines(section_content[section][start:start + line_count])
+            cursors[section] = start + line_count
+    else:
+        for section in section_order:
+            if section in section_content:
+                add_lines(section_content[section])
+
+    content = ''.join(chunks)
+    if content.endswith(newline):
+        content = content[:-len(newline)]
+    elif content.endswith('\n'):
+        content = content[:-1]
+    return content
+
+
+def get_value_component_count(value):
+    if not value:
+        return 0
+    components = [comp.strip() for comp in value.split(',')]
+    components = [comp for comp in components if comp]
+    return len(components)
+
+
+def merge_values_by_count(v1_val, v2_val):
+    """Use v1 value if component counts differ; use v2 if counts are equal"""
+    if not v1_val:
+        return v2_val
+    if not v2_val:
+        return v1_val
+    v1_count = get_value_component_count(v1_val)
+    v2_count = get_value_component_count(v2_val)
+    return v1_val if v1_count != v2_count else v2_val
+
+
+def get_key_occurrence(parsed_data, section, key, index=0):
+    """获取键的第index次出现；重复次数不足时返回生效值（最后一次出现）"""
+    occurrences = parsed_data.get('duplicate_keys', {}).get(section, {}).get(key)
+    if occurrences:
+        return occurrences[min(index, len(occurrences) - 1)]
+    return {
+        'value': parsed_data['data'][section][key],
+        'comment': parsed_data.get('line_comments', {}).get(section, {}).get(key, ''),
+        'original_line': parsed_data.get('original_key_value_lines', {}).get(section, {}).get(key),
+        'spacing': parsed_data.get('key_value_spacing', {}).get(section, {}).get(key, {'before_equals': 1,
+                                                                                       'after_equals': 1}),
+        'comment_spacing': parsed_data.get('comment_spacing', {}).get(section, {}).get(key, {'before_comment': 0,
+                                                                                             'after_semicolon': 1}),
+    }
+
+
+def build_merged_line(key, final_val, v1_record, v2_record):
+    """按合并规则生成键值行：等号前后空格使用vdf2，注释不同时使用vdf1的注释及其分号空格"""
+    v1_comment = v1_record['comment']
+    v2_comment = v2_record['comment']
+    v2_spacing_info = v2_record['spacing']
+
+    # 检查注释是否相同，如果不同则使用vdf1的注释内容
+    # 并使用对应的分号前后空格格式
+    if v1_comment.strip() != v2_comment.strip():
+        # 使用vdf1的注释内容和分号前后空格格式
+        merged_line = create_merged_line_with_vdf1_comment_spacing(
+            key, final_val, v2_spacing_info, v1_record['comment_spacing'], v1_comment)
+        comment_source = "vdf1 (with vdf1 semicolon spacing)"
+    else:
+        # 使用vdf2的注释内容和分号前后空格格式
+        merged_line = create_merged_line_with_vdf2_spacing(
+            key, final_val, v2_spacing_info, v2_record['comment_spacing'], v2_comment)
+        comment_source = "vdf2 (with vdf2 semicolon spacing)"
+    return merged_line, comment_source
+
+
+def merge_vdf_data(vdf1_parsed, vdf2_parsed, section_cache=None):
+    """合并vdf2到vdf1
+
+    section_cache为字典时缓存逐键合并过的章节：同一组基础/派生配置共享同一章节的解析结果
+    （见parse_vdf_content的base_parsed），共享章节只合并一次，其余文件直接复用合并结果。
+    """
+    v2_data = vdf2_parsed['data']
+
+    v1_content = vdf1_parsed.get('section_content', {})
+    v2_content = vdf2_parsed.get('section_content', {})
+
+    v1_section_order = vdf1_parsed.get('section_order', [])
+
+    merged_data = {}
+    merged_key_order = {}
+    merged_section_content = {}
+    merged_original_lines = {}
+
+    # 只保留vdf1中存在的章节（删除vdf2独有的章节）
+    merged_section_order = [section for section in v1_section_order]
+
+    # 只保留vdf1的独立注释（删除vdf2独有的独立注释）
+    merged_standalone_comments = vdf1_parsed.get('standalone_comments', [])
+
+    # 合并后内容与vdf1完全相同的章节，保存时直接从vdf1原文切片输出
+    verbatim_sections = set()
+    v1_verbatim_sections = vdf1_parsed.get('verbatim_sections', ())
+
+    for section in merged_section_order:
+        # vdf2中没有与该章节相同的键：章节不变，直接沿用vdf1的内容（共享，不复制），不逐行解析
+        if section in v1_content and (section not in v2_data
+                                      or v2_data[section].keys().isdisjoint(vdf1_parsed['data'][section])):
+            merged_data[section] = vdf1_parsed['data'][section]
+            merged_key_order[section] = vdf1_parsed['key_order'][section]
+            merged_section_content[section] = v1_content[section]
+            merged_original_lines[section] = vdf1_parsed.get('original_key_value_lines', {}).get(section, {})
+            if section in v1_verbatim_sections:
+                verbatim_sections.add(section)
+            continue
+
+        v1_has_section = section in v1_content
+        v2_has_section = section in v2_content
+
+        # 两边章节都与之前合并过的文件共享同一解析结果：直接复用合并结果
+        cache_key = None
+        if section_cache is not None and v1_has_section and v2_has_section:
+            cache_key = (id(v1_content[section]), id(v2_content[section]))
+            cached = section_cache.get(cache_key)
+            if cached is not None and cached[0] is v1_content[section] and cached[1] is v2_content[section]:
+                (merged_section_content[section], merged_data[section], merged_key_order[section],
+                 merged_original_lines[section], is_verbatim) = cached[2:]
+                if is_verbatim and section in v1_verbatim_sections:
+                    verbatim_sections.add(section)
+                continue
+
+        merged_data[section] = {}
+        merged_key_order[section] = []
+        merged_section_content[section] = []
+        merged_original_lines[section] = {}
+
+        # 重复键按出现次序配对：vdf1第i次出现对应vdf2第i次出现
+        occurrence_index = {}
+
+        # 只处理vdf1中存在的章节
+        if v1_has_section:
+            # 首先处理v1的内容（保持顺序）
+            for line in v1_content[section]:
+                key = extract_key_from_line(line) if is_key_value_line(line) else None
+                if not key:
+                    # 非键值行（注释、空行等），直接添加（只保留vdf1中的非键值行）
+                    merged_section_content[section].append(line)
+                    continue
+
+                index = occurrence_index.get(key, 0)
+                occurrence_index[key] = index + 1
+
+                v1_record = get_key_occurrence(vdf1_parsed, section, key, index)
+                v1_val = v1_record['value']
+                v1_original_line = v1_record['original_line'] or line
+
+                # 只保留vdf1中存在的键（删除vdf2独有的键）
+                if v2_has_section and key in v2_data[section]:
+                    # 键在两个文件中都存在
+                    v2_record = get_key_occurrence(vdf2_parsed, section, key, index)
+                    v2_val = v2_record['value']
+
+                    final_val = merge_values_by_count(v1_val, v2_val)
+                    merged_line, _ = build_merged_line(key, final_val, v1_record, v2_record)
+                else:
+                    # 键只在v1中存在，保留（vdf2中没有这个键）
+                    final_val = v1_val
+                    merged_line = v1_original_line
+
+                merged_section_content[section].append(merged_line)
+                if key not in merged_data[section]:
+                    merged_key_order[section].append(key)
+                # 重复键的生效值为最后一次出现
+                merged_data[section][key] = final_val
+                merged_original_lines[section][key] = merged_line
+
+            is_verbatim = merged_section_content[section] == v1_content[section]
+            if is_verbatim and section in v1_verbatim_sections:
+                verbatim_sections.add(section)
+            if cache_key is not None:
+                section_cache[cache_key] = (v1_content[section], v2_content[section], merged_section_content[section],
+                                            merged_data[section], merged_key_order[section],
+                                            merged_original_lines[section], is_verbatim)
+
+    # 分离键值行和非键值行
+    merged_kv_lines = {}
+    merged_non_kv_lines = {}
+    v1_kv_lines = vdf1_parsed.get('section_key_value_lines', {})
+    v1_non_kv_lines = vdf1_parsed.get('section_non_key_value_lines', {})
+    for section in merged_section_order:
+        if section in verbatim_sections and section in v1_kv_lines:
+            merged_kv_lines[section] = v1_kv_lines[section]
+            merged_non_kv_lines[section] = v1_non_kv_lines[section]
+            continue
+        kv, non_kv = separate_key_value_lines(merged_section_content[section])
+        merged_kv_lines[section] = kv
+        merged_non_kv_lines[section] = non_kv
+
+    return {
+        'data': merged_data,
+        'section_order': merged_section_order,
+        'key_order': merged_key_order,
+        'section_content': merged_section_content,
+        'section_key_value_lines': merged_kv_lines,
+        'section_non_kv_lines': merged_non_kv_lines,
+        'standalone_comments': merged_standalone_comments,
+        'original_key_value_lines': merged_original_lines,
+        'section_blocks': vdf1_parsed.get('section_blocks'),  # 合并后每行一一对应vdf1，块结构不变
+        'source': vdf1_parsed.get('source'),
+        'preamble_end': vdf1_parsed.get('preamble_end'),
+        'verbatim_sections': verbatim_sections,
+        'newline': vdf1_parsed.get('newline', '\n')
+    }
+
+
+def count_section_blocks(parsed_data):
+    """统计每个章节在文件中出现的块数（重复章节时大于1）"""
+    counts = {}
+    for block in parsed_data.get('section_blocks') or []:
+        section = block[0]
+        counts[section] = counts.get(section, 0) + 1
+    return counts
+
+
+def strip_final_newline_line(parsed_data):
+    """返回(去掉文件末尾换行对应空行的section_content副本, 文件是否以换行结尾)"""
+    section_content = parsed_data.get('section_content', {})
+    blocks = parsed_data.get('section_blocks') or []
+    if blocks and blocks[-1][1] > 1:
+        last_lines = section_content.get(blocks[-1][0])
+        if last_lines and last_lines[-1] == '':
+            section_content = dict(section_content)
+            section_content[blocks[-1][0]] = last_lines[:-1]
+            return section_content, True
+    return section_content, False
+
+
+def merge_vdf_three_way(base_parsed, ours_parsed, theirs_parsed):
+    """三方合并：base为共同祖先，ours（vdf1）为输出结构的基础，theirs（vdf2）的修改合并进来
+
+    - 只有一方修改的键取修改方的值；theirs的修改使用build_merged_line的格式规则
+    - 双方修改为不同值（或一方修改另一方删除）时记为冲突，保留ours
+    - theirs未改动的章节直接复制ours的原始行（保存时按原文切片输出），ours未改动的章节直接复制theirs的原始行，
+      均不做键值解析
+    - 返回结果中的'conflicts'为冲突列表，每项包含section/key/base/ours/theirs
+    """
+    base_data = base_parsed['data']
+    ours_data = ours_parsed['data']
+    theirs_data = theirs_parsed['data']
+    # 文件末尾的换行在解析结果中是最后一个章节末尾的空行，比较章节和追加章节时先去掉，合并后再放回
+    base_content, _ = strip_final_newline_line(base_parsed)
+    ours_content, ours_ends_with_newline = strip_final_newline_line(ours_parsed)
+    theirs_content, _ = strip_final_newline_line(theirs_parsed)
+
+    ours_block_counts = count_section_blocks(ours_parsed)
+    theirs_block_counts = count_section_blocks(theirs_parsed)
+
+    merged_data = {}
+    merged_key_order = {}
+    merged_section_content = {}
+    merged_section_order = []
+    merged_section_blocks = [list(block) for block in ours_parsed.get('section_blocks') or []]
+    ours_last_block = merged_section_blocks[-1] if merged_section_blocks else None
+    if ours_ends_with_newline:
+        ours_last_block[1] -= 1
+    ours_verbatim_sections = ours_parsed.get('verbatim_sections', ())
+    verbatim_sections = set()
+    conflicts = []
+
+    def add_conflict(section, key, base_val, ours_val, theirs_val):
+        conflicts.append({'section': section, 'key': key, 'base': base_val, 'ours': ours_val, 'theirs': theirs_val})
+
+    def set_block_length(section, line_count):
+        for block in merged_section_blocks:
+            if block[0] == section:
+                block[1] = line_count
+
+    def grow_last_block(section, extra_lines):
+        for block in reversed(merged_section_blocks):
+            if block[0] == section:
+                block[1] += extra_lines
+                return
+
+    for section in ours_parsed.get('section_order', []):
+        ours_lines = ours_content[section]
+        base_lines = base_content.get(section)
+        theirs_lines = theirs_content.get(section)
+
+        if section not in theirs_content:
+            if base_lines is not None:
+                if ours_lines == base_lines:
+                    # theirs删除了章节，ours未修改：删除
+                    merged_section_blocks = [b for b in merged_section_blocks if b[0] != section]
+                    continue
+                add_conflict(section, None, 'present', 'modified', None)
+            merged_section_order.append(section)
+            if section in ours_verbatim_sections:
+                verbatim_sections.add(section)
+            merged_section_content[section] = list(ours_lines)
+            merged_data[section] = dict(ours_data[section])
+            merged_key_order[section] = list(ours_parsed['key_order'][section])
+            continue
+
+        merged_section_order.append(section)
+
+        # 章节级快速路径：只有一方修改了该章节时，直接复制该方的原始行
+        if theirs_lines == base_lines or theirs_lines == ours_lines:
+            if section in ours_verbatim_sections:
+                verbatim_sections.add(section)
+            merged_section_content[section] = list(ours_lines)
+            merged_data[section] = dict(ours_data[section])
+            merged_key_order[section] = list(ours_parsed['key_order'][section])
+            continue
+        if (ours_lines == base_lines and ours_block_counts.get(section) == 1
+                and theirs_block_counts.get(section) == 1):
+            merged_section_content[section] = list(theirs_lines)
+            merged_data[section] = dict(theirs_data[section])
+            merged_key_order[section] = list(theirs_parsed['key_order'][section])
+            set_block_length(section, len(theirs_lines))
+            continue
+
+        # 双方都修改了该章节：逐键三方比较
+        base_section = base_data.get(section, {})
+        theirs_section = theirs_data[section]
+        section_lines = []
+        section_data = {}
+        section_key_order = []
+        occurrence_index = {}
+
+        for line in ours_lines:
+            key = extract_key_from_line(line) if is_key_value_line(line) else None
+            if not key:
+                section_lines.append(line)
+                continue
+
+            index = occurrence_index.get(key, 0)
+            occurrence_index[key] = index + 1
+
+            ours_record = get_key_occurrence(ours_parsed, section, key, index)
+            ours_val = ours_record['value']
+            base_val = get_key_occurrence(base_parsed, section, key, index)['value'] if key in base_section else None
+            theirs_record = get_key_occurrence(theirs_parsed, section, key, index) if key in theirs_section else None
+            theirs_val = theirs_record['value'] if theirs_record else None
+
+            if theirs_val == base_val or theirs_val == ours_val:
+                # theirs未修改，或双方修改相同
+                final_val = ours_val
+                merged_line = line
+            elif ours_val == base_val:
+                # 只有theirs修改
+                if theirs_record is None:
+                    # theirs删除了该键
+                    continue
+                final_val = theirs_val
+                merged_line, _ = build_merged_line(key, theirs_val, ours_record, theirs_record)
+            else:
+                add_conflict(section, key, base_val, ours_val, theirs_val)
+                final_val = ours_val
+                merged_line = line
+
+            section_lines.append(merged_line)
+            if key not in section_data:
+                section_key_order.append(key)
+            section_data[key] = final_val
+
+        # theirs新增的键插入到章节末尾的空行之前；ours删除而theirs修改的键记为冲突
+        added_lines = []
+        for key in theirs_parsed['key_order'][section]:
+            if key in ours_data[section]:
+                continue
+            if key in base_section:
+                if theirs_section[key] != base_section[key]:
+                    add_conflict(section, key, base_section[key], None, theirs_section[key])
+                continue
+            occurrences = theirs_parsed.get('duplicate_keys', {}).get(section, {}).get(key)
+            for record in occurrences or [get_key_occurrence(theirs_parsed, section, key)]:
+                added_lines.append(record['original_line'])
+            section_key_order.append(key)
+            section_data[key] = theirs_section[key]
+
+        if added_lines:
+            insert_at = len(section_lines)
+            while insert_at > 1 and not section_lines[insert_at - 1].strip():
+                insert_at -= 1
+            section_lines[insert_at:insert_at] = added_lines
+        line_delta = len(section_lines) - len(ours_lines)
+        if line_delta:
+            grow_last_block(section, line_delta)
+
+        if section in ours_verbatim_sections and section_lines == ours_lines:
+            verbatim_sections.add(section)
+        merged_section_content[section] = section_lines
+        merged_data[section] = section_data
+        merged_key_order[section] = section_key_order
+
+    # theirs新增的章节追加到末尾；ours删除而theirs修改的章节记为冲突
+    added_sections = []
+    for section in theirs_parsed.get('section_order', []):
+        if section in ours_content:
+            continue
+        if section in base_content:
+            if theirs_content[section] != base_content[section]:
+                add_conflict(section, None, 'present', None, 'modified')
+            continue
+        added_sections.append(section)
+
+    for section in added_sections:
+        section_lines = list(theirs_content[section])
+        if section == added_sections[-1]:
+            # 在theirs中用来与下一个章节分隔的空行，追加到末尾后不再需要
+            while len(section_lines) > 1 and not section_lines[-1].strip():
+                section_lines.pop()
+        merged_section_order.append(section)
+        merged_section_content[section] = section_lines
+        merged_data[section] = dict(theirs_data[section])
+        merged_key_order[section] = list(theirs_parsed['key_order'][section])
+        merged_section_blocks.append([section, len(section_lines)])
+
+    # 文件末尾的换行放回输出的最后一个章节块。最后一个块不再是ours原来的最后一个块时，
+    # 两者的原文切片都与新的位置不符（前者包含末尾的换行，后者不包含），改为按行输出
+    if ours_ends_with_newline and merged_section_blocks:
+        last_block = merged_section_blocks[-1]
+        merged_section_content[last_block[0]].append('')
+        last_block[1] += 1
+        if last_block is not ours_last_block:
+            verbatim_sections.discard(last_block[0])
+            verbatim_sections.discard(ours_last_block[0])
+
+    merged_kv_lines = {}
+    merged_non_kv_lines = {}
+    for section in merged_section_order:
+        kv, non_kv = separate_key_value_lines(merged_section_content[section])
+        merged_kv_lines[section] = kv
+        merged_non_kv_lines[section] = non_kv
+
+    return {
+        'data': merged_data,
+        'section_order': merged_section_order,
+        'key_order': merged_key_order,
+        'section_content': merged_section_content,
+        'section_key_value_lines': merged_kv_lines,
+        'section_non_kv_lines': merged_non_kv_lines,
+        'standalone_comments': ours_parsed.get('standalone_comments', []),
+        'section_blocks': merged_section_blocks,
+        'source': ours_parsed.get('source'),
+        'preamble_end': ours_parsed.get('preamble_end'),
+        'verbatim_sections': verbatim_sections,
+        'newline': ours_parsed.get('newline', '\n'),
+        'conflicts': conflicts
+    }
+
+
+def save_vdf_file(parsed_data, output_path):
+    content = generate_vdf_content(parsed_data)
+    # 确保输出目录存在
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    # 输出文件若是硬链接，先断开，避免写入时修改到源文件
+    if os.path.exists(output_path) and os.stat(output_path).st_nlink > 1:
+        os.remove(output_path)
+    # newline=''：content中已是原文件的换行符，不再转换（否则Windows上CRLF会变成\r\r\n）
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+
+
+def diff_vdf_data(vdf1_parsed, vdf2_parsed):
+    """比较两个vdf的生效值，返回差异列表
+
+    每项为{'change': 'added'/'removed'/'changed', 'section', 'key', 'old', 'new'}；
+    整个章节增删时key为None。
+    """
+    v1_data = vdf1_parsed['data']
+    v2_data = vdf2_parsed['data']
+    changes = []
+
+    for section in vdf1_parsed['section_order']:
+        if section not in v2_data:
+            changes.append({'change': 'removed', 'section': section, 'key': None, 'old': None, 'new': None})
+            continue
+        v1_section = v1_data[section]
+        v2_section = v2_data[section]
+        for key in vdf1_parsed['key_order'][section]:
+            if key not in v2_section:
+                changes.append({'change': 'removed', 'section': section, 'key': key,
+                                'old': v1_section[key], 'new': None})
+            elif v1_section[key] != v2_section[key]:
+                changes.append({'change': 'changed', 'section': section, 'key': key,
+                                'old': v1_section[key], 'new': v2_section[key]})
+        for key in vdf2_parsed['key_order'][section]:
+            if key not in v1_section:
+                changes.append({'change': 'added', 'section': section, 'key': key,
+                                'old': None, 'new': v2_section[key]})
+
+    for section in vdf2_parsed['section_order']:
+        if section not in v1_data:
+            changes.append({'change': 'added', 'section': section, 'key': None, 'old': None, 'new': None})
+
+    return changes
@@ -0,0 +1,176 @@
+"""批量载入大量vdf并去重存储
+
+同一批配置中章节名、键名、注释（如'//sigmaL01'）、整行LUT值和空格信息大量重复。
+载入时章节名/键名用sys.intern驻留，其余字符串和空格信息字典通过共享的池去重，
+所有文档引用同一个对象。载入后的文档应视为只读。
+"""
+import os
+import sys
+
+from .core import read_vdf_file
+
+# 每个键都有的空格信息字典，只有少数几种取值，池中以('spacing', 各字段值)为键
+SPACING_FIELDS = ('before_equals', 'after_equals')
+COMMENT_SPACING_FIELDS = ('before_comment', 'after_semicolon')
+
+
+def pooled(pool, text):
+    """返回池中与text相等的字符串对象"""
+    return pool.setdefault(text, text)
+
+
+def spacing_pool_key(spacing, fields):
+    return (fields,) + tuple(spacing.get(field) for field in fields)
+
+
+def intern_section_map(section_map, convert):
+    return {sys.intern(section): {sys.intern(key): convert(value) for key, value in keys.items()}
+            for section, keys in section_map.items()}
+
+
+def intern_document(parsed_data, pool, keep_source=False, usage=None):
+    """把一个解析结果中的字符串替换为池中的共享对象（原地修改并返回）
+
+    keep_source=False时丢弃原始文本（'source'），保存时改为按行拼接，换行符统一为原文件的换行符。
+    usage不为None时，把本文档用到的池中的键计入usage（{键: 文档数}），供prune_pool使用。
+    """
+    touched = set() if usage is not None else None
+
+    def line(text):
+        text = pooled(pool, text)
+        if touched is not None:
+            touched.add(text)
+        return text
+
+    def lines(items):
+        return [line(text) for text in items]
+
+    def pooled_info(info, fields):
+        pool_key = spacing_pool_key(info, fields)
+        if touched is not None:
+            touched.add(pool_key)
+        return pool.setdefault(pool_key, info)
+
+    def spacing(info):
+        return pooled_info(info, SPACING_FIELDS)
+
+    def comment_spacing(info):
+        return pooled_info(info, COMMENT_SPACING_FIELDS)
+
+    def record(occurrence):
+        return {
+            'value': line(occurrence['value']),
+            'comment': line(occurrence['comment']),
+            'original_line': line(occurrence['original_line']),
+            'spacing': spacing(occurrence['spacing']),
+            'comment_spacing': comment_spacing(occurrence['comment_spacing']),
+        }
+
+    parsed_data['section_order'] = [sys.intern(section) for section in parsed_data['section_order']]
+    parsed_data['data'] = intern_section_map(parsed_data['data'], line)
+    parsed_data['line_comments'] = intern_section_map(parsed_data['line_comments'], line)
+    parsed_data['original_key_value_lines'] = intern_section_map(parsed_data['original_key_value_lines'], line)
+    parsed_data['key_value_spacing'] = intern_section_map(parsed_data['key_value_spacing'], spacing)
+    parsed_data['comment_spacing'] = intern_section_map(parsed_data['comment_spacing'], comment_spacing)
+    parsed_data['duplicate_keys'] = intern_section_map(parsed_data.get('duplicate_keys', {}),
+                                                       lambda occurrences: [record(o) for o in occurrences])
+    parsed_data['key_order'] = {sys.intern(section): [sys.intern(key) for key in keys]
+                                for section, keys in parsed_data['key_order'].items()}
+    for field in ('section_content', 'section_key_value_lines', 'section_non_key_value_lines'):
+        parsed_data[field] = {sys.intern(section): lines(items) for section, items in parsed_data[field].items()}
+    parsed_data['standalone_comments'] = lines(parsed_data['standalone_comments'])
+    for block in parsed_data.get('section_blocks') or []:
+        block[0] = sys.intern(block[0])
+
+    if not keep_source:
+        parsed_data.pop('source', None)
+        parsed_data.pop('preamble_end', None)
+        parsed_data['verbatim_sections'] = set()
+    if touched is not None:
+        for pool_key in touched:
+            usage[pool_key] = usage.get(pool_key, 0) + 1
+    return parsed_data
+
+
+def prune_pool(pool, usage):
+    """删除池中只被一个文档使用的对象，返回删除的数量
+
+    只在一个文档中出现的值无法在文档间共享，留在池中只会多占一个字典项（空格信息还多一个元组键）。
+    usage为intern_document统计的{池中的键: 使用该键的文档数}；删除后已载入的文档不受影响。
+    """
+    singletons = [pool_key for pool_key, count in usage.items() if count == 1 and pool_key in pool]
+    for pool_key in singletons:
+        del pool[pool_key]
+    return len(singletons)
+
+
+def estimate_memory(obj, seen=None):
+    """估算对象占用的内存（字节），同一对象只计算一次"""
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+def load_corpus(paths, keep_source=False, pool=None, measure=False, prune=None):
+    """载入文件或文件夹（递归查找.vdf）中的所有vdf并去重存储
+
+    返回{'documents': {路径: 解析结果}, 'pool': 字符串池, 'stats': 统计信息}。
+    pool可传入已有的池，继续向同一语料中追加文件。
+    prune=True时载入后从池中删除只在一个文件中出现的值（见prune_pool）；默认只在新建池时删除，
+    传入已有的池时保留这些值以便与之后追加的文件共享。之后还要向新池追加文件时可传入prune=False。
+    对已有的池指定prune=True时只删除本次新加入的值，之前载入的文件可能也在使用池中原有的值。
+    measure=True时统计去重前后的内存占用（需要额外遍历，仅用于评估）：
+    stats中的bytes_before为各文件单独解析时的总占用，bytes_after为去重后文档与池的总占用。
+    """
+    from .folders import find_vdf_files
+
+    new_pool = pool is None
+    if new_pool:
+        pool = {}
+    if prune is None:
+        prune = new_pool
+    existing = set(pool) if prune and not new_pool else None
+    usage = {} if prune else None
+    documents = {}
+    bytes_before = 0
+    for path in paths:
+        file_paths = find_vdf_files(path) if os.path.isdir(path) else [path]
+        for file_path in file_paths:
+            parsed = read_vdf_file(file_path)
+            if measure:
+                bytes_before += estimate_memory(parsed)
+            documents[file_path] = intern_document(parsed, pool, keep_source=keep_source, usage=usage)
+
+    pruned = 0
+    if prune:
+        if existing:
+            usage = {pool_key: count for pool_key, count in usage.items() if pool_key not in existing}
+        pruned = prune_pool(pool, usage)
+        if new_pool and pruned:
+            # 删除字典项不会缩小字典，重新构建以释放空间（传入的池保持为同一个对象）
+            pool = dict(pool)
+    stats = {'files': len(documents), 'pooled_objects': len(pool), 'pruned_objects': pruned}
+    if measure:
+        # 池的字典和键（空格信息的键是单独的元组）也要计入；与文档共享的对象只计算一次
+        seen = set()
+        bytes_after = estimate_memory(documents, seen) + estimate_memory(pool, seen)
+        stats.update({
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'saved_bytes': bytes_before - bytes_after,
+            'saved_ratio': (bytes_before - bytes_after) / bytes_before if bytes_before else 0.0,
+        })
+    return {'documents': documents, 'pool': pool, 'stats': stats}
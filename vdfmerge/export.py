@@ -0,0 +1,314 @@
+"""把整个vdf目录树导出到SQLite（可选再导出NumPy .npz），用于跨传感器/跨版本的分析查询
+
+数据库中每个文件一行（files），按列拆分为章节（sections）、键（keys）和注释（comments）。
+keys中保存原始值文本，数值LUT另存为lut列（本机字节序float64数组的BLOB，非数值为NULL），
+不再拆成每个分量一行，写入和导出.npz时只需整块复制。同一个数据库可以导出多个目录树，
+用files.root区分，files.relpath相同即为不同版本中的同一个文件。
+
+重复导出时按内容哈希增量更新：修改时间和大小未变的文件直接跳过，
+变化的文件先删除旧行再重新写入，目录中已删除的文件同时从数据库中删除。
+所有写入在一个事务中通过executemany批量完成。
+"""
+import math
+import os
+import sqlite3
+from array import array
+
+from .core import extract_key_from_line, is_key_value_line, is_section_line, read_vdf_file
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    relpath TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    UNIQUE (root, relpath)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    section_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    key_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    section_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    occurrence INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    component_count INTEGER NOT NULL,
+    lut BLOB
+);
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    section_id INTEGER,
+    key_id INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_file ON sections (file_id);
+CREATE INDEX IF NOT EXISTS sections_name ON sections (name);
+CREATE INDEX IF NOT EXISTS keys_file ON keys (file_id);
+CREATE INDEX IF NOT EXISTS keys_section_name ON keys (section_id, name);
+CREATE INDEX IF NOT EXISTS comments_file ON comments (file_id);
+"""
+
+# 各表的插入语句，列顺序与export_vdf_tree中生成的行一致
+INSERT_SQL = {
+    'files': "INSERT INTO files (file_id, root, relpath, digest, size, mtime_ns) VALUES (?, ?, ?, ?, ?, ?)",
+    'sections': "INSERT INTO sections (section_id, file_id, position, name) VALUES (?, ?, ?, ?)",
+    'keys': "INSERT INTO keys (key_id, file_id, section_id, position, occurrence, name, value, component_count, "
+            "lut) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'comments': "INSERT INTO comments (file_id, section_id, key_id, text) VALUES (?, ?, ?, ?)",
+}
+
+# 累计到这么多行时先执行一次executemany（仍在同一事务中），避免整棵树的行全部留在内存里
+FLUSH_ROWS = 100000
+
+# 包含全角分号（部分配置用'；'写注释）
+COMMENT_PREFIXES = (';', '；', '//', '#')
+
+
+def parse_numeric_components(value):
+    """把'1,2,0x10,3.5'这样的值解析为数值列表；任一分量不是有限的数值时返回None
+
+    float()和int()接受的'nan'、'inf'和'1_0'这类写法不算数值。
+    """
+    if '_' in value:
+        return None
+    components = value.split(',')
+    if not components[-1].strip():
+        # 允许末尾多一个逗号
+        components.pop()
+    try:
+        # 绝大多数LUT都是十进制数，float()本身会忽略分量两端的空格
+        numbers = list(map(float, components))
+    except ValueError:
+        numbers = None
+    if numbers is not None:
+        return numbers if numbers and all(map(math.isfinite, numbers)) else None
+    # 含十六进制分量时逐个解析
+    numbers = []
+    for component in components:
+        component = component.strip()
+        try:
+            if component.lower().lstrip('+-').startswith('0x'):
+                number = float(int(component, 16))
+            else:
+                number = float(component)
+        except (ValueError, OverflowError):
+            return None
+        if not math.isfinite(number):
+            return None
+        numbers.append(number)
+    return numbers or None
+
+
+def open_export_database(db_path):
+    """打开（必要时创建）导出数据库"""
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA_SQL)
+    return connection
+
+
+def iter_export_files(paths):
+    """展开文件/文件夹参数，生成(根目录, 相对路径, 完整路径)"""
+    from .folders import find_vdf_files
+
+    for path in paths:
+        if os.path.isdir(path):
+            root = os.path.abspath(path)
+            for file_path in sorted(find_vdf_files(path)):
+                yield root, os.path.relpath(file_path, path).replace(os.sep, '/'), file_path
+        else:
+            yield os.path.dirname(os.path.abspath(path)), os.path.basename(path), path
+
+
+def delete_file_rows(connection, file_ids):
+    rows = [(file_id,) for file_id in file_ids]
+    for table in ('comments', 'keys', 'sections', 'files'):
+        connection.executemany(f"DELETE FROM {table} WHERE file_id = ?", rows)
+
+
+def export_vdf_tree(paths, db_path, npz_path=None, prune=True):
+    """把文件或文件夹（递归查找.vdf）导出到SQLite数据库db_path
+
+    prune=True时删除数据库中属于这些文件夹、但文件夹里已不存在的文件。
+    同一个数据库可重复导出：未变化的文件跳过，变化的文件重新写入。
+    npz_path不为None时，在数据库有更新或npz文件不存在时重新生成数值LUT的.npz（需要NumPy）。
+    返回统计信息{'files', 'exported', 'unchanged', 'removed'}。
+    """
+    from .folders import file_digest
+
+    connection = open_export_database(db_path)
+    stats = {'files': 0, 'exported': 0, 'unchanged': 0, 'removed': 0}
+    try:
+        with connection:
+            known = {}
+            for file_id, root, relpath, digest, size, mtime_ns in connection.execute(
+                    "SELECT file_id, root, relpath, digest, size, mtime_ns FROM files"):
+                known[(root, relpath)] = (file_id, digest, size, mtime_ns)
+            next_ids = {}
+            for table, column in (('files', 'file_id'), ('sections', 'section_id'), ('keys', 'key_id')):
+                next_ids[table] = connection.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}").fetchone()[0]
+
+            rows = {table: [] for table in INSERT_SQL}
+
+            def flush():
+                for table, table_rows in rows.items():
+                    if table_rows:
+                        connection.executemany(INSERT_SQL[table], table_rows)
+                        table_rows.clear()
+
+            def new_id(table):
+                next_ids[table] += 1
+                return next_ids[table]
+
+            seen = set()
+            for root, relpath, file_path in iter_export_files(paths):
+                if (root, relpath) in seen:
+                    # 参数重叠（同一文件夹传入两次，或文件夹和其中的文件）时只导出一次
+                    continue
+                seen.add((root, relpath))
+                stats['files'] += 1
+                st = os.stat(file_path)
+                previous = known.get((root, relpath))
+                digest = None
+                if previous is not None:
+                    if (previous[2], previous[3]) == (st.st_size, st.st_mtime_ns):
+                        stats['unchanged'] += 1
+                        continue
+                    digest = file_digest(file_path)
+                    if digest == previous[1]:
+                        # 只有修改时间变了，更新后下次不必再计算哈希
+                        connection.execute("UPDATE files SET mtime_ns = ? WHERE file_id = ?",
+                                           (st.st_mtime_ns, previous[0]))
+                        stats['unchanged'] += 1
+                        continue
+                    # 内容已变化：删除旧行后重新写入
+                    delete_file_rows(connection, [previous[0]])
+
+                parsed = read_vdf_file(file_path)
+                file_id = new_id('files')
+                rows['files'].append((file_id, root, relpath, digest or file_digest(file_path), st.st_size,
+                                       st.st_mtime_ns))
+                for comment in parsed.get('standalone_comments', []):
+                    if comment.strip().startswith(COMMENT_PREFIXES):
+                        rows['comments'].append((file_id, None, None, comment.strip()))
+
+                for section_position, section in enumerate(parsed['section_order']):
+                    section_id = new_id('sections')
+                    rows['sections'].append((section_id, file_id, section_position, section))
+                    for line in parsed['section_non_key_value_lines'].get(section, []):
+                        if line.strip().startswith(COMMENT_PREFIXES):
+                            rows['comments'].append((file_id, section_id, None, line.strip()))
+
+                    duplicates = parsed.get('duplicate_keys', {}).get(section, {})
+                    occurrence_counts = {}
+                    position = 0
+                    # 按文件中的行序编号：重复键的各次出现与其他键交错时，position仍与行序一致
+                    for line in parsed['section_content'][section]:
+                        if is_section_line(line) or not is_key_value_line(line):
+                            continue
+                        key = extract_key_from_line(line)
+                        if not key:
+                            continue
+                        occurrence_index = occurrence_counts.get(key, 0)
+                        occurrence_counts[key] = occurrence_index + 1
+                        if key in duplicates:
+                            occurrence = duplicates[key][occurrence_index]
+                        else:
+                            occurrence = {'value': parsed['data'][section][key],
+                                          'comment': parsed['line_comments'][section].get(key, '')}
+                        value = occurrence['value'] or ''
+                        numbers = parse_numeric_components(value)
+                        if numbers is not None:
+                            component_count = len(numbers)
+                            lut = array('d', numbers).tobytes()
+                        else:
+                            component_count = len([c for c in value.split(',') if c.strip()])
+                            lut = None
+                        key_id = new_id('keys')
+                        rows['keys'].append((key_id, file_id, section_id, position, occurrence_index, key, value,
+                                             component_count, lut))
+                        position += 1
+                        if occurrence['comment'].strip():
+                            rows['comments'].append((file_id, section_id, key_id, occurrence['comment'].strip()))
+
+                stats['exported'] += 1
+                if sum(map(len, rows.values())) >= FLUSH_ROWS:
+                    flush()
+
+            flush()
+            if prune:
+                # 只清理作为文件夹传入的目录树，单独传入的文件不影响同目录下的其他文件
+                roots = {os.path.abspath(path) for path in paths if os.path.isdir(path)}
+                removed = [entry[0] for (root, relpath), entry in known.items()
+                           if root in roots and (root, relpath) not in seen]
+                delete_file_rows(connection, removed)
+                stats['removed'] = len(removed)
+
+        if npz_path is not None and (stats['exported'] or stats['removed'] or not os.path.exists(npz_path)):
+            export_lut_npz(connection, npz_path)
+    finally:
+        connection.close()
+    return stats
+
+
+def export_lut_npz(connection, npz_path):
+    """从导出数据库生成数值LUT的.npz（需要NumPy），不再重新解析vdf
+
+    npz中按列存储：path（'根目录/相对路径'）、section、key、occurrence各一个数组，
+    第i个LUT的分量为values[offsets[i]:offsets[i + 1]]。
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("NumPy is required for .npz export (pip install numpy)")
+
+    if isinstance(connection, str):
+        connection = open_export_database(connection)
+        try:
+            return export_lut_npz(connection, npz_path)
+        finally:
+            connection.close()
+
+    entries = connection.execute(
+        "SELECT f.root, f.relpath, s.name, k.name, k.occurrence, k.component_count, k.lut "
+        "FROM keys k JOIN files f ON f.file_id = k.file_id JOIN sections s ON s.section_id = k.section_id "
+        "WHERE k.lut IS NOT NULL ORDER BY k.key_id").fetchall()
+    counts = np.fromiter((entry[5] for entry in entries), dtype=np.int64, count=len(entries))
+    offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    values = np.frombuffer(b''.join(entry[6] for entry in entries), dtype=np.float64)
+
+    output_dir = os.path.dirname(npz_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    np.savez(npz_path,
+             path=np.array([f"{entry[0]}/{entry[1]}" for entry in entries], dtype=str),
+             section=np.array([entry[2] for entry in entries], dtype=str),
+             key=np.array([entry[3] for entry in entries], dtype=str),
+             occurrence=np.array([entry[4] for entry in entries], dtype=np.int64),
+             offsets=offsets,
+             values=values)
+
+
+def load_lut_npz(npz_path):
+    """读取export_lut_npz生成的.npz，返回{(文件, 章节, 键): 数组}
+
+    同一个键重复出现时取最后一次出现（即生效值）。数组是values的切片视图，不复制数据。
+    """
+    import numpy as np
+
+    with np.load(npz_path) as archive:
+        offsets = archive['offsets']
+        values = archive['values']
+        return {(file_name, section, key): values[offsets[i]:offsets[i + 1]]
+                for i, (file_name, section, key) in enumerate(zip(archive['path'].tolist(),
+                                                                  archive['section'].tolist(),
+                                                                  archive['key'].tolist()))}
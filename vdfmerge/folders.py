@@ -0,0 +1,418 @@
+"""文件夹级别的批量合并，以及文件复制/比较等辅助函数"""
+import hashlib
+import os
+import shutil
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .core import merge_vdf_data, merge_vdf_three_way, read_vdf_file, save_vdf_file
+
+# Linux FICLONE ioctl：在btrfs/xfs等文件系统上创建写时复制（reflink）副本
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def three_way_merge_files(base_path, ours_path, theirs_path, output_path):
+    """三方合并单个文件并保存，返回冲突列表"""
+    merged_parsed = merge_vdf_three_way(read_vdf_file(base_path), read_vdf_file(ours_path),
+                                        read_vdf_file(theirs_path))
+    save_vdf_file(merged_parsed, output_path)
+
+    for conflict in merged_parsed['conflicts']:
+        location = f"[{conflict['section']}]" if conflict['key'] is None \
+            else f"[{conflict['section']}] {conflict['key']}"
+        print(f"✗ Conflict {location}: base={conflict['base']!r}, ours={conflict['ours']!r}, "
+              f"theirs={conflict['theirs']!r} (kept ours)")
+    return merged_parsed['conflicts']
+
+
+def merge_vdf_folders(folder1, folder2, output_folder):
+    if not os.path.isdir(folder1):
+        raise IOError("Folder not found: " + folder1)
+    if not os.path.isdir(folder2):
+        raise IOError("Folder not found: " + folder2)
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    files1 = {f.lower(): os.path.join(folder1, f) for f in os.listdir(folder1) if f.lower().endswith('.vdf')}
+    files2 = {f.lower(): os.path.join(folder2, f) for f in os.listdir(folder2) if f.lower().endswith('.vdf')}
+
+    common_files = set(files1.keys()) & set(files2.keys())
+
+    for fname_lower in sorted(common_files):
+        f1_path = files1[fname_lower]
+        f2_path = files2[fname_lower]
+
+        vdf1_parsed = read_vdf_file(f1_path)
+        vdf2_parsed = read_vdf_file(f2_path)
+
+        merged_parsed = merge_vdf_data(vdf1_parsed, vdf2_parsed)
+
+        output_path = os.path.join(output_folder, fname_lower)
+        save_vdf_file(merged_parsed, output_path)
+
+
+def file_digest(file_path):
+    """计算文件内容的哈希值（blake2b，分块读取）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_identical(file1_path, file2_path):
+    """先比较文件大小，大小相同时再比较哈希值"""
+    if os.path.getsize(file1_path) != os.path.getsize(file2_path):
+        return False
+    return file_digest(file1_path) == file_digest(file2_path)
+
+
+def clone_file(source_path, output_path, hardlink=False):
+    """复制文件：优先硬链接（可选）或reflink写时复制，不支持时回退到shutil.copy2
+
+    返回实际使用的方式：'hardlink'、'reflink' 或 'copy'
+    """
+    if os.path.lexists(output_path):
+        if os.path.exists(output_path) and os.path.samefile(source_path, output_path):
+            return 'hardlink'
+        os.remove(output_path)
+
+    if hardlink:
+        try:
+            os.link(source_path, output_path)
+            return 'hardlink'
+        except OSError:
+            pass
+
+    if fcntl is not None and sys.platform.startswith('linux'):
+        try:
+            with open(source_path, 'rb') as src, open(output_path, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(source_path, output_path)
+            return 'reflink'
+        except OSError:
+            # 文件系统不支持reflink，下面用普通复制覆盖
+            pass
+
+    shutil.copy2(source_path, output_path)
+    return 'copy'
+
+
+def find_vdf_files(folder_path):
+    """查找文件夹中的所有vdf文件"""
+    vdf_files = []
+    for root, dirs, files in os.walk(folder_path):
+        for file in files:
+            if file.lower().endswith('.vdf'):
+                vdf_files.append(os.path.join(root, file))
+    return vdf_files
+
+
+def get_cached_vdf(cache, file_path, base_parsed=None):
+    """读取vdf文件，文件未变化（修改时间和大小相同）时直接返回缓存的解析结果"""
+    st = os.stat(file_path)
+    stat_key = (st.st_mtime_ns, st.st_size)
+    cached = cache.get(file_path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+    parsed = read_vdf_file(file_path, base_parsed=base_parsed)
+    cache[file_path] = (stat_key, parsed)
+    return parsed
+
+
+def merge_file_pair(vdf1_path, vdf2_path, output_path, link_identical=False, vdf1_parsed=None, schema=None,
+                    vdf2_parsed=None, base_parsed=None, section_cache=None, violations=None):
+    """合并一对文件并保存
+
+    内容相同的文件对直接复制vdf1，返回复制方式（'hardlink'/'reflink'/'copy'）；正常合并时返回None。
+    vdf1_parsed/vdf2_parsed可传入已解析好的文件（如监视模式中缓存的基线），避免重复解析。
+    schema为编译后的schema（见schema.load_schema）时校验合并结果（见merge_parsed_pair），
+    violations为列表时把违规项追加到其中。
+    base_parsed为基础配置的(vdf1解析结果, vdf2解析结果)时，按派生配置解析，与基础配置相同的章节共享解析结果，
+    并通过section_cache共享合并结果（见merge_vdf_data）。
+    """
+    # 内容相同的文件对，合并结果就是vdf1，直接复制
+    if files_identical(vdf1_path, vdf2_path):
+        return clone_file(vdf1_path, output_path, hardlink=link_identical)
+
+    # 读取并解析文件
+    base1_parsed, base2_parsed = base_parsed or (None, None)
+    if vdf1_parsed is None:
+        vdf1_parsed = read_vdf_file(vdf1_path, base_parsed=base1_parsed)
+    if vdf2_parsed is None:
+        vdf2_parsed = read_vdf_file(vdf2_path, base_parsed=base2_parsed)
+
+    # 合并并保存
+    merged_parsed = merge_parsed_pair(vdf1_parsed, vdf2_parsed, output_path, schema=schema,
+                                      section_cache=section_cache)
+    save_vdf_file(merged_parsed, output_path)
+    if violations is not None:
+        violations.extend(merged_parsed['violations'])
+    return None
+
+
+def merge_parsed_pair(vdf1_parsed, vdf2_parsed, output_name, schema=None, section_cache=None):
+    """合并两个已解析的文件：输出解析警告，合并，给定schema时校验；返回合并结果（不保存）
+
+    合并结果完整校验一次；vdf2只校验未被采用的值（合并结果中的值与vdf2不同，如分量个数不同而被丢弃），
+    以便发现被丢弃的vdf2值的问题。违规项输出后放在返回结果的'violations'中。
+    """
+    for parsed in (vdf1_parsed, vdf2_parsed):
+        for warning in parsed['warnings']:
+            print(f"⚠ {parsed['file_name']}: {warning}")
+
+    merged_parsed = merge_vdf_data(vdf1_parsed, vdf2_parsed, section_cache=section_cache)
+
+    violations = []
+    if schema is not None:
+        from .schema import format_violation, validate_vdf_data
+        merged_data = merged_parsed['data']
+        discarded = [(section, key) for section, section_data in vdf2_parsed['data'].items()
+                     for key, value in section_data.items() if merged_data.get(section, {}).get(key) != value]
+        violations = validate_vdf_data(vdf2_parsed, schema, keys=discarded) + \
+            validate_vdf_data(merged_parsed, schema, output_name)
+        for violation in violations:
+            print(format_violation(violation))
+    merged_parsed['violations'] = violations
+    return merged_parsed
+
+
+def find_variant_groups(filenames):
+    """按文件名识别基础配置与派生配置：config1_meta_128.vdf的基础配置为config1.vdf
+
+    返回{基础文件名: [派生文件名, ...]}；有多个候选时取最长的基础名。
+    """
+    names = set(filenames)
+    groups = {}
+    for filename in sorted(names):
+        stem, ext = os.path.splitext(filename)
+        pos = stem.rfind('_')
+        while pos > 0:
+            candidate = stem[:pos] + ext
+            if candidate in names:
+                groups.setdefault(candidate, []).append(filename)
+                break
+            pos = stem.rfind('_', 0, pos)
+    return groups
+
+
+def order_with_variants(filenames, variants):
+    """排列合并顺序：每个基础配置后紧跟其派生配置，返回[(文件名, 基础文件名或None)]
+
+    variants为'auto'时按文件名自动识别，为字典时表示{派生文件名: 基础文件名}
+    """
+    names = set(filenames)
+    if variants == 'auto':
+        groups = find_variant_groups(names)
+    else:
+        groups = {}
+        for variant_name, base_name in sorted(variants.items()):
+            if variant_name in names and base_name in names and variant_name != base_name:
+                groups.setdefault(base_name, []).append(variant_name)
+    variant_names = {name for group in groups.values() for name in group}
+
+    ordered = []
+    for filename in sorted(names - variant_names):
+        ordered.append((filename, None))
+        for variant_name in groups.get(filename, []):
+            ordered.append((variant_name, filename))
+    # 基础配置本身也是派生配置时（多级派生），剩余的按单个文件合并
+    placed = {filename for filename, _ in ordered}
+    ordered.extend((filename, None) for filename in sorted(names - placed))
+    return ordered, groups
+
+
+def merge_pair_list(merge_order, variant_groups, pair_io, schema=None, violations=None):
+    """按merge_order（[(名称, 基础名称或None)]，见order_with_variants）依次合并文件对，文件夹和压缩包共用
+
+    基础配置的解析结果和章节合并缓存留给紧跟其后的派生配置使用。读写由pair_io中的函数完成：
+    - 'start'(名称)：开始处理一个文件对（输出标题、读入内容等）
+    - 'copy_identical'(名称)：两侧内容相同时直接复制vdf1，返回复制方式；不同时返回None
+    - 'parse'(名称, 1或2, 基础配置的解析结果或None)：解析vdf1或vdf2
+    - 'save'(名称, 合并结果)：保存合并结果
+    - 'output_name'(名称)：输出的名称（用于校验信息）
+    - 'source1'：内容相同时输出信息中的来源名称
+    violations为列表时把schema违规项追加到其中。返回(成功数, 失败数, 内容相同直接复制的数量)
+    """
+    merged_count = 0
+    skipped_count = 0
+    identical_count = 0
+
+    # 当前基础配置的(名称, vdf1解析结果, vdf2解析结果, 章节合并缓存)
+    base_context = None
+
+    for filename, base_name in merge_order:
+        try:
+            pair_io['start'](filename)
+
+            parsed_pair = None
+            base_parsed = (None, None)
+            section_cache = None
+            if base_name is None and filename in variant_groups:
+                # 基础配置：内容相同时也先解析，留给后面的派生配置使用
+                base_context = (filename, pair_io['parse'](filename, 1, None), pair_io['parse'](filename, 2, None), {})
+                parsed_pair = base_context[1:3]
+                section_cache = base_context[3]
+            elif base_name is not None and base_context is not None and base_context[0] == base_name:
+                base_parsed = base_context[1:3]
+                section_cache = base_context[3]
+
+            identical_method = pair_io['copy_identical'](filename)
+            if identical_method:
+                print(f"✓ Identical files, {identical_method} from {pair_io['source1']}: {filename}")
+                identical_count += 1
+                merged_count += 1
+                continue
+
+            if parsed_pair is None:
+                parsed_pair = (pair_io['parse'](filename, 1, base_parsed[0]),
+                               pair_io['parse'](filename, 2, base_parsed[1]))
+            merged_parsed = merge_parsed_pair(parsed_pair[0], parsed_pair[1], pair_io['output_name'](filename),
+                                              schema=schema, section_cache=section_cache)
+            pair_io['save'](filename, merged_parsed)
+            if violations is not None:
+                violations.extend(merged_parsed['violations'])
+            print(f"✓ Successfully merged {filename}")
+            merged_count += 1
+
+        except Exception as e:
+            print(f"✗ Failed to merge {filename}: {e}")
+            skipped_count += 1
+
+    return merged_count, skipped_count, identical_count
+
+
+def merge_file_list(merge_order, variant_groups, vdf1_dict, vdf2_dict, output_folder_path, link_identical=False,
+                    schema=None, parsed_cache=None, violations=None):
+    """按merge_order合并文件夹中的文件对（见merge_pair_list），返回(成功数, 失败数, 内容相同直接复制的数量)
+
+    parsed_cache不为None时，vdf1的解析结果经get_cached_vdf读取并留在缓存中（内容相同的文件对也解析），
+    供监视模式之后的重新合并使用。
+    """
+    def output_path(filename):
+        return os.path.join(output_folder_path, filename)
+
+    def start(filename):
+        print(f"\n=== Merging {filename} ===")
+        print(f"Folder1 file: {vdf1_dict[filename]}")
+        print(f"Folder2 file: {vdf2_dict[filename]}")
+        print(f"Output file: {output_path(filename)}")
+
+    def copy_identical(filename):
+        if not files_identical(vdf1_dict[filename], vdf2_dict[filename]):
+            return None
+        if parsed_cache is not None:
+            get_cached_vdf(parsed_cache, vdf1_dict[filename])
+        return clone_file(vdf1_dict[filename], output_path(filename), hardlink=link_identical)
+
+    def parse(filename, side, base_parsed):
+        if side == 1 and parsed_cache is not None:
+            return get_cached_vdf(parsed_cache, vdf1_dict[filename], base_parsed=base_parsed)
+        return read_vdf_file((vdf1_dict if side == 1 else vdf2_dict)[filename], base_parsed=base_parsed)
+
+    def save(filename, merged_parsed):
+        save_vdf_file(merged_parsed, output_path(filename))
+
+    pair_io = {'start': start, 'copy_identical': copy_identical, 'parse': parse, 'save': save,
+               'output_name': output_path, 'source1': 'folder1'}
+    return merge_pair_list(merge_order, variant_groups, pair_io, schema=schema, violations=violations)
+
+
+def batch_merge_folders(folder1_path, folder2_path, output_folder_path, link_identical=False, schema=None,
+                        variants=None, workers=None, max_inflight_bytes=None, parsed_cache=None):
+    """批量合并两个文件夹中的vdf文件，返回{'files', 'merged', 'identical', 'skipped', 'violations'}
+
+    内容完全相同的文件对不再解析合并，直接复制vdf1（link_identical=True时使用硬链接）
+    给定schema时校验每个合并的文件对（见merge_parsed_pair），违规项汇总在返回结果的'violations'中
+    variants为'auto'或{派生文件名: 基础文件名}时，派生配置中与基础配置相同的章节只解析、合并一次
+    workers大于1时在多个进程中并行合并，按文件大小从大到小分配，
+    同时处理的输入总字节数不超过max_inflight_bytes（见schedule模块）
+    输入为zip/tar压缩包或输出路径以压缩包扩展名结尾时，改为按相对路径匹配，不解压到磁盘（见archives模块）
+    parsed_cache为监视模式的解析缓存，单进程合并时填入vdf1的解析结果（见merge_file_list）
+    """
+    # 两个输入都是文件夹、输出路径没有扩展名时不可能涉及压缩包，不导入archives
+    if not (os.path.isdir(folder1_path) and os.path.isdir(folder2_path)) or os.path.splitext(output_folder_path)[1]:
+        from . import archives
+        if archives.is_archive(folder1_path) or archives.is_archive(folder2_path) or \
+                archives.archive_write_mode(output_folder_path):
+            if (workers and workers > 1) or max_inflight_bytes is not None:
+                # 压缩包的句柄和tar的读取位置无法在进程间共享
+                print("⚠ workers/max_inflight_bytes ignored: archives are merged in a single process")
+            return archives.batch_merge_archives(folder1_path, folder2_path, output_folder_path, schema=schema,
+                                                 variants=variants, link_identical=link_identical)
+
+    # 查找两个文件夹中的所有vdf文件
+    vdf1_files = find_vdf_files(folder1_path)
+    vdf2_files = find_vdf_files(folder2_path)
+
+    # 提取文件名（不含路径）用于匹配
+    vdf1_dict = {os.path.basename(file): file for file in vdf1_files}
+    vdf2_dict = {os.path.basename(file): file for file in vdf2_files}
+
+    # 找到两个文件夹中都存在的文件
+    common_files = set(vdf1_dict.keys()) & set(vdf2_dict.keys())
+
+    print(f"Found {len(vdf1_files)} VDF files in folder 1")
+    print(f"Found {len(vdf2_files)} VDF files in folder 2")
+    print(f"Found {len(common_files)} common VDF files to merge")
+
+    # 创建输出文件夹
+    os.makedirs(output_folder_path, exist_ok=True)
+
+    if variants:
+        merge_order, variant_groups = order_with_variants(common_files, variants)
+    else:
+        merge_order, variant_groups = [(filename, None) for filename in common_files], {}
+
+    violations = []
+    if workers and workers > 1:
+        from .schedule import run_scheduled_merge
+        merged_count, skipped_count, identical_count = run_scheduled_merge(
+            merge_order, variant_groups, vdf1_dict, vdf2_dict, output_folder_path, workers,
+            max_inflight_bytes=max_inflight_bytes, link_identical=link_identical, schema=schema,
+            violations=violations)
+    else:
+        merged_count, skipped_count, identical_count = merge_file_list(
+            merge_order, variant_groups, vdf1_dict, vdf2_dict, output_folder_path, link_identical=link_identical,
+            schema=schema, parsed_cache=parsed_cache, violations=violations)
+
+    # 复制folder1中独有的文件到输出文件夹
+    unique_to_folder1 = set(vdf1_dict.keys()) - set(vdf2_dict.keys())
+    for filename in unique_to_folder1:
+        try:
+            source_path = vdf1_dict[filename]
+            output_path = os.path.join(output_folder_path, filename)
+
+            # 确保目标目录存在
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            # 复制文件（支持时使用reflink写时复制）
+            method = clone_file(source_path, output_path)
+            print(f"✓ Copied unique file from folder1 ({method}): {filename}")
+            merged_count += 1
+
+        except Exception as e:
+            print(f"✗ Failed to copy {filename}: {e}")
+            skipped_count += 1
+
+    report = {'files': len(common_files) + len(unique_to_folder1), 'merged': merged_count,
+              'identical': identical_count, 'skipped': skipped_count, 'violations': violations}
+    print_merge_summary(report, schema, f"Output folder: {output_folder_path}")
+    return report
+
+
+def print_merge_summary(report, schema, output_line):
+    print(f"\n=== Merge Summary ===")
+    print(f"Total files processed: {report['files']}")
+    print(f"Successfully merged: {report['merged']}")
+    print(f"Identical pairs copied without merging: {report['identical']}")
+    print(f"Skipped/Failed: {report['skipped']}")
+    if schema is not None:
+        print(f"Schema violations: {len(report['violations'])}")
+    print(output_line)
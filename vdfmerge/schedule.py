@@ -0,0 +1,135 @@
+"""按文件大小调度的并行批量合并
+
+合并前先stat所有输入，把文件对分成任务（基础配置和它的派生配置为同一个任务，以共享解析结果），
+按输入字节数从大到小分配给空闲的工作进程，让最大的文件最先开始，不会在最后单独拖长总耗时。
+同时处理的输入总字节数不超过max_inflight_bytes：最大的任务放不下时，先分配放得下的较小任务；
+没有任务在处理时，超过上限的单个任务也照常执行。
+
+每个任务的输出在工作进程中收集，完成后整段打印，不同文件的输出不会交错。
+结束时输出每个工作进程的任务数、处理字节数和忙碌时间占比。
+"""
+import contextlib
+import io
+import os
+import time
+
+from .folders import merge_file_list
+
+
+def build_merge_units(merge_order, vdf1_dict, vdf2_dict, copy_files=()):
+    """把merge_order分成任务，按输入字节数从大到小返回
+
+    每个任务为{'files': [(文件名, 基础文件名或None)], 'copy': [文件名], 'bytes': 输入总字节数}；
+    copy_files中只需复制的vdf1文件各自成为一个只有'copy'的任务（分片队列使用）。
+    """
+    units = []
+    for filename, base_name in merge_order:
+        size = os.path.getsize(vdf1_dict[filename]) + os.path.getsize(vdf2_dict[filename])
+        if base_name is not None and units and units[-1]['files'][0][0] == base_name:
+            # 派生配置紧跟在基础配置之后（见order_with_variants），与基础配置放在同一个任务中
+            units[-1]['files'].append((filename, base_name))
+            units[-1]['bytes'] += size
+        else:
+            units.append({'files': [(filename, base_name)], 'copy': [], 'bytes': size})
+    for filename in copy_files:
+        units.append({'files': [], 'copy': [filename], 'bytes': os.path.getsize(vdf1_dict[filename])})
+    return sorted(units, key=lambda unit: unit['bytes'], reverse=True)
+
+
+def run_merge_unit(files, variant_groups, vdf1_dict, vdf2_dict, output_folder_path, link_identical, schema):
+    """在工作进程中合并一个任务，返回计数、忙碌时间和收集的输出"""
+    start = time.perf_counter()
+    output = io.StringIO()
+    violations = []
+    with contextlib.redirect_stdout(output):
+        counts = merge_file_list(files, variant_groups, vdf1_dict, vdf2_dict, output_folder_path,
+                                 link_identical=link_identical, schema=schema, violations=violations)
+    return {'pid': os.getpid(), 'busy': time.perf_counter() - start, 'counts': counts, 'output': output.getvalue(),
+            'violations': violations}
+
+
+def next_unit_index(pending, inflight_bytes, max_inflight_bytes, idle):
+    """pending按字节数从大到小排列，返回能放进剩余额度的最大任务的下标；没有时返回None"""
+    if idle or max_inflight_bytes is None:
+        return 0
+    for index, unit in enumerate(pending):
+        if inflight_bytes + unit['bytes'] <= max_inflight_bytes:
+            return index
+    return None
+
+
+def run_scheduled_merge(merge_order, variant_groups, vdf1_dict, vdf2_dict, output_folder_path, workers,
+                        max_inflight_bytes=None, link_identical=False, schema=None, violations=None):
+    """用workers个进程并行合并merge_order中的文件对，返回(成功数, 失败数, 相同数)
+
+    violations为列表时把各进程返回的schema违规项追加到其中。
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    pending = build_merge_units(merge_order, vdf1_dict, vdf2_dict)
+    merged_count = skipped_count = identical_count = 0
+    worker_stats = {}
+    unit_busy = []
+    inflight = {}
+    inflight_bytes = 0
+    peak_inflight_bytes = 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or inflight:
+            # 只在有空闲进程时提交，保证任务按调度顺序开始，而不是在执行器的队列中排队
+            while pending and len(inflight) < workers:
+                index = next_unit_index(pending, inflight_bytes, max_inflight_bytes, idle=not inflight)
+                if index is None:
+                    break
+                unit = pending.pop(index)
+                names = [filename for filename, _ in unit['files']]
+                future = executor.submit(run_merge_unit, unit['files'],
+                                         {name: variant_groups[name] for name in names if name in variant_groups},
+                                         {name: vdf1_dict[name] for name in names},
+                                         {name: vdf2_dict[name] for name in names},
+                                         output_folder_path, link_identical, schema)
+                inflight[future] = unit
+                inflight_bytes += unit['bytes']
+                peak_inflight_bytes = max(peak_inflight_bytes, inflight_bytes)
+
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                unit = inflight.pop(future)
+                inflight_bytes -= unit['bytes']
+                try:
+                    result = future.result()
+                except Exception as e:
+                    for filename, _ in unit['files']:
+                        print(f"✗ Failed to merge {filename}: {e}")
+                    skipped_count += len(unit['files'])
+                    continue
+                print(result['output'], end='')
+                merged, skipped, identical = result['counts']
+                merged_count += merged
+                skipped_count += skipped
+                identical_count += identical
+                if violations is not None:
+                    violations.extend(result['violations'])
+                stats = worker_stats.setdefault(result['pid'], {'units': 0, 'bytes': 0, 'busy': 0.0})
+                stats['units'] += 1
+                stats['bytes'] += unit['bytes']
+                stats['busy'] += result['busy']
+                unit_busy.append(result['busy'])
+    wall = time.perf_counter() - start
+
+    print_utilization(worker_stats, workers, wall, unit_busy, peak_inflight_bytes, max_inflight_bytes)
+    return merged_count, skipped_count, identical_count
+
+
+def print_utilization(worker_stats, workers, wall, unit_busy, peak_inflight_bytes, max_inflight_bytes):
+    print(f"\n=== Worker Utilization ===")
+    for number, (pid, stats) in enumerate(sorted(worker_stats.items()), 1):
+        utilization = stats['busy'] / wall if wall else 0.0
+        print(f"Worker {number} (pid {pid}): {stats['units']} jobs, {stats['bytes'] / 1e6:.1f} MB, "
+              f"busy {stats['busy']:.2f}s ({utilization:.0%})")
+    # 理想耗时：总工作量平均分给所有进程，但不会短于最大的单个任务
+    ideal = max(sum(unit_busy) / workers, max(unit_busy)) if unit_busy else 0.0
+    print(f"Wall time: {wall:.2f}s (ideal {ideal:.2f}s, largest job {max(unit_busy, default=0.0):.2f}s)")
+    limit = f" of {max_inflight_bytes / 1e6:.1f} MB" if max_inflight_bytes is not None else ""
+    print(f"Peak in-flight input: {peak_inflight_bytes / 1e6:.1f} MB{limit}")
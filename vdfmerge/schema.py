@@ -0,0 +1,224 @@
+"""按schema校验vdf键值：分量个数、类型与取值范围
+
+schema为JSON文件，章节 -> 键 -> 规则，章节名"*"表示适用于所有章节：
+
+    {
+        "MLNR": {"sigma": {"count": 16, "type": "int", "min": 0, "max": 1023, "required": true}},
+        "*": {"enable": {"count": 1, "type": "int", "min": 0, "max": 1}}
+    }
+
+规则字段均可省略；type为"int"、"float"或"str"（默认，不检查类型）。
+分量个数的数法与合并时相同（见core.get_value_component_count）：去掉首尾空白后为空的分量不计。
+空值有0个分量：规定了count时报告为count违规，未规定count时视为合法（键是否存在由required检查）。
+schema只编译一次：每条规则编译为一个正则表达式，一次匹配同时检查分量个数和类型，
+只有匹配失败时才逐个分量分析原因。LUT中相同的值大量重复，每条规则记住已校验过的值的结果。
+"""
+import json
+import os
+import re
+
+from .core import read_vdf_file
+
+WILDCARD_SECTION = '*'
+
+COMPONENT_PATTERNS = {
+    'int': r'[-+]?(?:0[xX][0-9a-fA-F]+|\d+)',
+    'float': r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?',
+    'str': r'[^,\s](?:[^,]*[^,\s])?',
+}
+
+# 每条规则最多记住的校验结果数，超过时清空重新记
+RESULT_CACHE_SIZE = 65536
+
+# 已编译的schema缓存：路径 -> ((修改时间, 大小), 编译结果)
+_compiled_schemas = {}
+
+
+def parse_number(component, value_type):
+    component = component.strip()
+    if value_type == 'int':
+        return int(component, 0) if component.lower().lstrip('+-').startswith('0x') else int(component)
+    return float(component)
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def compile_rule(section, key, rule):
+    value_type = rule.get('type', 'str')
+    if value_type not in COMPONENT_PATTERNS:
+        raise ValueError(f"Unknown type {value_type!r} for [{section}] {key}")
+    count = rule.get('count')
+    if count is not None and (not isinstance(count, int) or isinstance(count, bool) or count < 1):
+        raise ValueError(f"Invalid count {count!r} for [{section}] {key}")
+    for bound in ('min', 'max'):
+        if rule.get(bound) is not None and not is_number(rule[bound]):
+            raise ValueError(f"Invalid {bound} {rule[bound]!r} for [{section}] {key}")
+    component = COMPONENT_PATTERNS[value_type]
+    # 分量之间可以有多余的逗号（空分量），与合并时一样不计入个数
+    separator = r'\s*,[\s,]*'
+    if count is None:
+        # 分量个数不限，也允许空值
+        pattern = re.compile(r'[\s,]*(?:%s(?:%s%s)*[\s,]*)?' % (component, separator, component))
+    else:
+        pattern = re.compile(r'[\s,]*%s(?:%s%s){%d}[\s,]*' % (component, separator, component, count - 1))
+    return {
+        'count': count,
+        'type': value_type,
+        'min': rule.get('min'),
+        'max': rule.get('max'),
+        'required': bool(rule.get('required', False)),
+        'pattern': pattern,
+        'results': {},
+    }
+
+
+def compile_schema(schema):
+    """把schema字典编译为查找表：{'rules': {(章节, 键): 规则}, 'wildcard': {键: 规则}, 'required': {章节: [键]}}"""
+    rules = {}
+    wildcard = {}
+    required = {}
+    for section, keys in schema.items():
+        for key, rule in keys.items():
+            compiled = compile_rule(section, key, rule)
+            if section == WILDCARD_SECTION:
+                wildcard[key] = compiled
+            else:
+                rules[(section, key)] = compiled
+                if compiled['required']:
+                    required.setdefault(section, []).append(key)
+    return {'rules': rules, 'wildcard': wildcard, 'required': required}
+
+
+def load_schema(schema_path):
+    """读取并编译schema文件；文件未变化时直接返回已编译的结果"""
+    st = os.stat(schema_path)
+    stat_key = (st.st_mtime_ns, st.st_size)
+    cached = _compiled_schemas.get(schema_path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        compiled = compile_schema(json.load(f))
+    _compiled_schemas[schema_path] = (stat_key, compiled)
+    return compiled
+
+
+def describe_failure(value, rule):
+    """正则匹配失败后，逐个分量找出具体原因"""
+    components = [comp.strip() for comp in value.split(',')]
+    components = [comp for comp in components if comp]
+    if rule['count'] is not None and len(components) != rule['count']:
+        return 'count', rule['count'], len(components)
+    for index, component in enumerate(components):
+        try:
+            parse_number(component, rule['type'])
+        except ValueError:
+            return 'type', rule['type'], f"component {index}: {component!r}"
+    return 'format', rule['type'], value
+
+
+def parse_components(value, value_type):
+    """按类型解析值的所有非空分量（值已通过正则匹配）"""
+    parts = value.split(',')
+    try:
+        # 常见情况：十进制且没有空分量，整个在C中完成
+        return list(map(int if value_type == 'int' else float, parts))
+    except ValueError:
+        return [parse_number(part, value_type) for part in parts if part.strip()]
+
+
+def check_value(value, rule):
+    """校验一个值，返回None或(规则名, 期望, 实际)"""
+    numbers = None
+    if rule['type'] == 'int' and '_' not in value:
+        # int()接受的正好是十进制分量（除了下划线分隔），全部转换成功即说明类型正确，不必再匹配正则
+        try:
+            numbers = list(map(int, value.split(',')))
+        except ValueError:
+            pass
+    if numbers is not None:
+        if rule['count'] is not None and len(numbers) != rule['count']:
+            return 'count', rule['count'], len(numbers)
+    elif rule['pattern'].fullmatch(value) is None:
+        return describe_failure(value, rule)
+    if rule['type'] == 'str' or (rule['min'] is None and rule['max'] is None):
+        return None
+    if numbers is None:
+        numbers = parse_components(value, rule['type'])
+    if not numbers:
+        return None
+    low = min(numbers)
+    high = max(numbers)
+    if (rule['min'] is not None and low < rule['min']) or (rule['max'] is not None and high > rule['max']):
+        return 'range', [rule['min'], rule['max']], [low, high]
+    return None
+
+
+def validate_vdf_data(parsed_data, schema, file_name=None, keys=None):
+    """按编译后的schema校验一个已解析的vdf，返回违规列表
+
+    每项为{'file', 'section', 'key', 'rule', 'expected', 'actual', 'value'}，
+    rule为'count'、'type'、'format'、'range'或'missing'。
+    keys为[(章节, 键)]时只校验这些键，不检查必需的键。
+    """
+    file_name = file_name or parsed_data.get('file_name')
+    data = parsed_data['data']
+    rules = schema['rules']
+    wildcard = schema['wildcard']
+    violations = []
+
+    def add_violation(section, key, rule_name, expected, actual, value):
+        violations.append({'file': file_name, 'section': section, 'key': key, 'rule': rule_name,
+                           'expected': expected, 'actual': actual, 'value': value})
+
+    if keys is None:
+        items = ((section, key, value) for section, section_data in data.items()
+                 for key, value in section_data.items())
+    else:
+        items = ((section, key, data[section][key]) for section, key in keys)
+
+    for section, key, value in items:
+        rule = rules.get((section, key)) or wildcard.get(key)
+        if rule is None:
+            continue
+        value = value or ''
+        results = rule['results']
+        if value in results:
+            result = results[value]
+        else:
+            result = check_value(value, rule)
+            if len(results) >= RESULT_CACHE_SIZE:
+                results.clear()
+            results[value] = result
+        if result is not None:
+            add_violation(section, key, *result, value)
+
+    if keys is not None:
+        return violations
+    for section, keys in schema['required'].items():
+        section_data = parsed_data['data'].get(section)
+        if section_data is None:
+            continue
+        for key in keys:
+            if key not in section_data:
+                add_violation(section, key, 'missing', 'present', None, None)
+
+    return violations
+
+
+def validate_vdf_files(paths, schema):
+    """校验文件或文件夹（递归查找.vdf）中的所有vdf，返回违规列表"""
+    from .folders import find_vdf_files
+
+    violations = []
+    for path in paths:
+        file_paths = find_vdf_files(path) if os.path.isdir(path) else [path]
+        for file_path in file_paths:
+            violations.extend(validate_vdf_data(read_vdf_file(file_path), schema))
+    return violations
+
+
+def format_violation(violation):
+    location = f"{violation['file']}: [{violation['section']}] {violation['key']}"
+    return f"✗ {location}: {violation['rule']} expected {violation['expected']!r}, got {violation['actual']!r}"
@@ -0,0 +1,310 @@
+"""分片的多机批量合并：共享目录中的文件队列，不需要额外的服务
+
+协调端（create_merge_queue）把文件对分成分片，每个分片一个JSON文件，写入共享目录：
+
+    QUEUE/job.json                      输入/输出文件夹和合并选项
+    QUEUE/pending/shard-0001.json       待处理的分片
+    QUEUE/running/shard-0001.json@WORKER  正在处理（文件修改时间即心跳）
+    QUEUE/done/shard-0001.json          结果（计数、执行者、耗时）
+    QUEUE/failed/shard-0001.json        重试次数用尽的分片
+
+任意主机上的工作端（run_shard_worker）通过os.rename把分片从pending移到running来领取，
+rename是原子操作，同一分片只会被一个工作端领到（NFS等共享文件系统上同样成立）。
+处理期间定期更新running文件的修改时间；超过lease秒未更新的分片视为工作端已崩溃，
+由其他工作端接管重试。合并结果只取决于输入，同一分片重复执行得到相同的输出，
+done中的结果先写临时文件再替换，因此重复提交结果也是安全的。
+各主机的时钟需大致同步，lease应远大于时钟偏差。
+"""
+import contextlib
+import io
+import json
+import os
+import socket
+import threading
+import time
+
+from .folders import clone_file, find_vdf_files, merge_file_list, order_with_variants
+from .schedule import build_merge_units
+
+QUEUE_STATES = ('pending', 'running', 'done', 'failed')
+WORKER_SEPARATOR = '@'
+
+
+def queue_path(queue_dir, state, name=''):
+    return os.path.join(queue_dir, state, name)
+
+
+def write_json_atomic(path, data):
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, path)
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def plan_shards(folder1_path, folder2_path, shard_bytes, variants=None):
+    """列出文件对并按输入大小分片，返回分片列表（按字节数从大到小）
+
+    基础配置和它的派生配置放在同一分片中；只在folder1中的文件作为复制项分配到分片。
+    """
+    vdf1_dict = {os.path.basename(file): file for file in find_vdf_files(folder1_path)}
+    vdf2_dict = {os.path.basename(file): file for file in find_vdf_files(folder2_path)}
+    common_files = set(vdf1_dict) & set(vdf2_dict)
+    if variants:
+        merge_order, variant_groups = order_with_variants(common_files, variants)
+    else:
+        merge_order, variant_groups = [(filename, None) for filename in sorted(common_files)], {}
+
+    shards = []
+    current = None
+    for unit in build_merge_units(merge_order, vdf1_dict, vdf2_dict, sorted(set(vdf1_dict) - set(vdf2_dict))):
+        if current is None or current['bytes'] + unit['bytes'] > shard_bytes:
+            current = {'merge': [], 'copy': [], 'bytes': 0}
+            shards.append(current)
+        current['merge'].extend(list(item) for item in unit['files'])
+        current['copy'].extend(unit['copy'])
+        current['bytes'] += unit['bytes']
+
+    for shard in shards:
+        names = [filename for filename, _ in shard['merge']] + shard['copy']
+        shard['paths'] = {name: [os.path.relpath(vdf1_dict[name], folder1_path),
+                                 os.path.relpath(vdf2_dict[name], folder2_path) if name in vdf2_dict else None]
+                          for name in names}
+        shard['variant_bases'] = sorted(name for name in names if name in variant_groups)
+    return shards
+
+
+def create_merge_queue(folder1_path, folder2_path, output_folder_path, queue_dir, shard_bytes=64 * 1000 * 1000,
+                       variants=None, link_identical=False, schema_path=None, max_attempts=3):
+    """在queue_dir中创建合并队列，返回分片数；queue_dir中已有队列时报错"""
+    if os.path.exists(os.path.join(queue_dir, 'job.json')):
+        raise IOError(f"Queue already exists: {queue_dir}")
+    for folder in (folder1_path, folder2_path):
+        if not os.path.isdir(folder):
+            raise IOError(f"Folder not found: {folder}")
+
+    shards = plan_shards(folder1_path, folder2_path, shard_bytes, variants=variants)
+    for state in QUEUE_STATES:
+        os.makedirs(queue_path(queue_dir, state), exist_ok=True)
+    for number, shard in enumerate(shards, 1):
+        shard.update({'shard': f"shard-{number:04d}", 'attempts': 0})
+        write_json_atomic(queue_path(queue_dir, 'pending', f"{shard['shard']}.json"), shard)
+    # job.json最后写入：工作端看到它时所有分片都已就绪
+    write_json_atomic(os.path.join(queue_dir, 'job.json'), {
+        'folder1': os.path.abspath(folder1_path),
+        'folder2': os.path.abspath(folder2_path),
+        'output': os.path.abspath(output_folder_path),
+        'link_identical': link_identical,
+        'schema': os.path.abspath(schema_path) if schema_path else None,
+        'max_attempts': max_attempts,
+        'shards': len(shards),
+    })
+    return len(shards)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}".replace(WORKER_SEPARATOR, '_')
+
+
+def claim_shard(queue_dir, worker_id, lease):
+    """领取一个分片，返回running中的路径；先取pending中的分片，没有时接管心跳超时的分片"""
+    for name in sorted(os.listdir(queue_path(queue_dir, 'pending'))):
+        if not name.endswith('.json'):
+            continue
+        target = queue_path(queue_dir, 'running', f"{name}{WORKER_SEPARATOR}{worker_id}")
+        try:
+            os.rename(queue_path(queue_dir, 'pending', name), target)
+        except FileNotFoundError:
+            # 被其他工作端抢先领取
+            continue
+        # rename保留分片文件原来的修改时间（创建队列时），立即更新，免得被当作心跳超时而被接管
+        os.utime(target)
+        return target
+
+    now = time.time()
+    for name in sorted(os.listdir(queue_path(queue_dir, 'running'))):
+        path = queue_path(queue_dir, 'running', name)
+        try:
+            if now - os.stat(path).st_mtime < lease:
+                continue
+        except FileNotFoundError:
+            continue
+        shard_name = name.split(WORKER_SEPARATOR, 1)[0]
+        target = queue_path(queue_dir, 'running', f"{shard_name}{WORKER_SEPARATOR}{worker_id}")
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        os.utime(target)
+        print(f"⚠ Retrying {shard_name[:-5]} (no heartbeat from {name.split(WORKER_SEPARATOR, 1)[1]})")
+        return target
+    return None
+
+
+def keep_alive(path, interval, stop):
+    """处理分片期间定期更新running文件的修改时间"""
+    while not stop.wait(interval):
+        try:
+            os.utime(path)
+        except OSError:
+            return
+
+
+def process_shard(job, shard, schema):
+    """合并分片中的文件对并复制独有文件，返回(成功数, 失败数, 相同数)"""
+    vdf1_dict = {name: os.path.join(job['folder1'], paths[0]) for name, paths in shard['paths'].items()}
+    vdf2_dict = {name: os.path.join(job['folder2'], paths[1]) for name, paths in shard['paths'].items()
+                 if paths[1] is not None}
+    os.makedirs(job['output'], exist_ok=True)
+    merged_count, skipped_count, identical_count = merge_file_list(
+        [tuple(item) for item in shard['merge']], {name: True for name in shard['variant_bases']}, vdf1_dict,
+        vdf2_dict, job['output'], link_identical=job['link_identical'], schema=schema)
+    for filename in shard['copy']:
+        try:
+            method = clone_file(vdf1_dict[filename], os.path.join(job['output'], filename))
+            print(f"✓ Copied unique file from folder1 ({method}): {filename}")
+            merged_count += 1
+        except Exception as e:
+            print(f"✗ Failed to copy {filename}: {e}")
+            skipped_count += 1
+    return merged_count, skipped_count, identical_count
+
+
+def run_shard_worker(queue_dir, worker_id=None, lease=120.0, poll_interval=1.0, quiet=False):
+    """领取并处理分片，直到队列中没有待处理和正在处理的分片，返回本工作端处理的分片数"""
+    worker_id = worker_id or default_worker_id()
+    job = read_json(os.path.join(queue_dir, 'job.json'))
+    schema = None
+    if job['schema']:
+        from .schema import load_schema
+        schema = load_schema(job['schema'])
+
+    processed = 0
+    while True:
+        running_path = claim_shard(queue_dir, worker_id, lease)
+        if running_path is None:
+            if not os.listdir(queue_path(queue_dir, 'pending')) and not os.listdir(queue_path(queue_dir, 'running')):
+                return processed
+            # 其他工作端仍在处理：等待它们完成，或心跳超时后接管
+            time.sleep(poll_interval)
+            continue
+
+        shard_name = os.path.basename(running_path).split(WORKER_SEPARATOR, 1)[0]
+        done_path = queue_path(queue_dir, 'done', shard_name)
+        try:
+            shard = read_json(running_path)
+        except FileNotFoundError:
+            # 刚领取就被当作超时接管了
+            continue
+        if os.path.exists(done_path):
+            # 原工作端已提交结果，只是还没来得及删除running文件
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(running_path)
+            continue
+
+        shard['attempts'] += 1
+        if shard['attempts'] > job['max_attempts']:
+            print(f"✗ {shard['shard']} failed after {job['max_attempts']} attempts")
+            write_json_atomic(queue_path(queue_dir, 'failed', shard_name), shard)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(running_path)
+            continue
+        write_json_atomic(running_path, shard)
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=keep_alive, args=(running_path, lease / 4, stop), daemon=True)
+        heartbeat.start()
+        start = time.perf_counter()
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                counts = process_shard(job, shard, schema)
+        finally:
+            stop.set()
+            heartbeat.join()
+        if not quiet:
+            print(output.getvalue(), end='')
+
+        write_json_atomic(done_path, {
+            'shard': shard['shard'],
+            'worker': worker_id,
+            'attempts': shard['attempts'],
+            'seconds': time.perf_counter() - start,
+            'bytes': shard['bytes'],
+            'merged': counts[0],
+            'skipped': counts[1],
+            'identical': counts[2],
+            'errors': [line for line in output.getvalue().splitlines() if line.startswith('✗')],
+        })
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(running_path)
+        processed += 1
+        print(f"✓ {worker_id} finished {shard['shard']} ({counts[0]} merged, {counts[1]} failed)")
+
+
+def merge_queue_status(queue_dir):
+    """汇总队列状态：各状态的分片数，以及done中结果的合计"""
+    status = {state: sorted(name for name in os.listdir(queue_path(queue_dir, state)) if '.tmp' not in name)
+              for state in QUEUE_STATES}
+    totals = {'merged': 0, 'skipped': 0, 'identical': 0, 'errors': []}
+    workers = {}
+    for name in status['done']:
+        result = read_json(queue_path(queue_dir, 'done', name))
+        for field in ('merged', 'skipped', 'identical'):
+            totals[field] += result[field]
+        totals['errors'].extend(result['errors'])
+        worker = workers.setdefault(result['worker'], {'shards': 0, 'bytes': 0, 'seconds': 0.0})
+        worker['shards'] += 1
+        worker['bytes'] += result['bytes']
+        worker['seconds'] += result['seconds']
+    return {'counts': {state: len(names) for state, names in status.items()}, 'running': status['running'],
+            'failed': status['failed'], 'totals': totals, 'workers': workers}
+
+
+def print_queue_status(status):
+    counts = status['counts']
+    print(f"Shards: {counts['done']} done, {counts['running']} running, {counts['pending']} pending, "
+          f"{counts['failed']} failed")
+    for name in status['running']:
+        shard_name, worker = name.split(WORKER_SEPARATOR, 1)
+        print(f"  running {shard_name[:-5]} on {worker}")
+    for worker, stats in sorted(status['workers'].items()):
+        print(f"  {worker}: {stats['shards']} shards, {stats['bytes'] / 1e6:.1f} MB, {stats['seconds']:.2f}s")
+    totals = status['totals']
+    print(f"Successfully merged: {totals['merged']}")
+    print(f"Identical pairs copied without merging: {totals['identical']}")
+    print(f"Skipped/Failed: {totals['skipped']}")
+    for line in totals['errors']:
+        print(line)
+    for name in status['failed']:
+        print(f"✗ {name[:-5]} failed after retries")
+
+
+def run_sharded_merge(folder1_path, folder2_path, output_folder_path, queue_dir, workers=2, **queue_options):
+    """在本机用workers个工作进程执行队列（不存在时先创建，已存在时继续执行），返回队列状态
+
+    其他主机可以同时对同一个queue_dir运行run_shard_worker（vdfmerge queue work）加入处理。
+    """
+    import multiprocessing
+
+    if not os.path.exists(os.path.join(queue_dir, 'job.json')):
+        shard_count = create_merge_queue(folder1_path, folder2_path, output_folder_path, queue_dir, **queue_options)
+        print(f"Created {shard_count} shards in {queue_dir}")
+    else:
+        print(f"Resuming queue {queue_dir}")
+
+    processes = [multiprocessing.Process(target=run_shard_worker, args=(queue_dir,)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    status = merge_queue_status(queue_dir)
+    print(f"\n=== Merge Summary ===")
+    print_queue_status(status)
+    return status
@@ -0,0 +1,235 @@
+"""相似度索引：为草稿配置找出内容最接近的已有vdf
+
+每个文件提取两类特征：
+- 集合特征：(章节, 键, 值)元组，另加(章节, 键)元组，使键结构相同但取值不同的文件也有一定相似度。
+  用MinHash签名估计Jaccard相似度，签名按LSH分段放入桶中，查询时只比较落在相同桶中的候选文件。
+  签名用单次哈希分桶（one permutation hashing）计算，空桶从后面的非空桶借值（densification），
+  每个特征只需计算一次哈希。
+- 数值特征：所有数值LUT分量按(章节, 键, 下标)哈希投影到固定维数的向量（count sketch），
+  两个文件的LUT距离为两个向量差的范数除以范数之和（0~1）。
+
+得分 = (1 - numeric_weight) * Jaccard估计 + numeric_weight * (1 - LUT距离)。
+索引可以增量更新（按修改时间和大小跳过未变化的文件），并保存为JSON。
+"""
+import hashlib
+import json
+import math
+import os
+from array import array
+
+from .core import read_vdf_file
+
+DEFAULT_NUM_BINS = 128
+DEFAULT_BANDS = 32
+DEFAULT_LUT_DIMS = 256
+MASK64 = (1 << 64) - 1
+# LSH候选不足时，按Jaccard估计预选top_k的这么多倍再计算LUT距离
+RERANK_FACTOR = 10
+# 同一个键的相邻分量在投影中的步长（64位黄金分割常数）
+COMPONENT_STRIDE = 0x9E3779B97F4A7C15
+
+
+def hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def create_similarity_index(num_bins=DEFAULT_NUM_BINS, bands=DEFAULT_BANDS, lut_dims=DEFAULT_LUT_DIMS):
+    """创建空索引；num_bins为签名长度（2的幂），需能被bands整除"""
+    if num_bins & (num_bins - 1) or num_bins % bands:
+        raise ValueError(f"num_bins must be a power of two divisible by bands, got {num_bins} and {bands}")
+    return {'num_bins': num_bins, 'bands': bands, 'lut_dims': lut_dims, 'documents': {},
+            'buckets': [{} for _ in range(bands)]}
+
+
+def document_features(parsed_data):
+    """返回(集合特征的哈希值列表, {(章节, 键): 数值列表})"""
+    from .export import parse_numeric_components
+
+    hashes = []
+    luts = {}
+    for section, section_data in parsed_data['data'].items():
+        for key, value in section_data.items():
+            value = value or ''
+            hashes.append(hash64(f"{section}\0{key}"))
+            hashes.append(hash64(f"{section}\0{key}\0{value.strip()}"))
+            numbers = parse_numeric_components(value)
+            if numbers is not None:
+                luts[(section, key)] = numbers
+    return hashes, luts
+
+
+def minhash_signature(hashes, num_bins):
+    """单次哈希分桶的MinHash签名：高位决定桶，桶内取低位的最小值"""
+    shift = 64 - (num_bins.bit_length() - 1)
+    low_mask = (1 << shift) - 1
+    empty = 1 << 64
+    bins = [empty] * num_bins
+    for value in hashes:
+        index = value >> shift
+        low = value & low_mask
+        if low < bins[index]:
+            bins[index] = low
+    filled = [index for index, value in enumerate(bins) if value != empty]
+    if not filled or len(filled) == num_bins:
+        return tuple(bins)
+    # 空桶取其后第一个非空桶的值，并按距离加上偏移，使借来的值不会与原值混淆
+    signature = list(bins)
+    for index in range(num_bins):
+        if bins[index] == empty:
+            distance = 1
+            while bins[(index + distance) % num_bins] == empty:
+                distance += 1
+            signature[index] = bins[(index + distance) % num_bins] + (distance << shift)
+    return tuple(signature)
+
+
+def lut_sketch(luts, dims):
+    """把所有LUT分量投影到dims维向量，返回(向量, 范数)"""
+    sketch = array('d', bytes(8 * dims))
+    for (section, key), numbers in luts.items():
+        base = hash64(f"{section}\0{key}")
+        for index, number in enumerate(numbers):
+            position = (base + index * COMPONENT_STRIDE) & MASK64
+            if position >> 63:
+                sketch[position % dims] += number
+            else:
+                sketch[position % dims] -= number
+    return sketch, math.sqrt(sum(value * value for value in sketch))
+
+
+def describe_document(index, parsed_data):
+    hashes, luts = document_features(parsed_data)
+    sketch, norm = lut_sketch(luts, index['lut_dims'])
+    return {'signature': minhash_signature(hashes, index['num_bins']), 'lut': sketch, 'lut_norm': norm}
+
+
+def band_keys(index, signature):
+    rows = index['num_bins'] // index['bands']
+    return [signature[band * rows:(band + 1) * rows] for band in range(index['bands'])]
+
+
+def add_to_index(index, name, parsed_data, stat_key=None):
+    """加入（或替换）一个文件；stat_key为(修改时间, 大小)，用于增量更新时跳过未变化的文件"""
+    remove_from_index(index, name)
+    document = describe_document(index, parsed_data)
+    document['stat'] = stat_key
+    index['documents'][name] = document
+    for buckets, band_key in zip(index['buckets'], band_keys(index, document['signature'])):
+        buckets.setdefault(band_key, set()).add(name)
+    return document
+
+
+def remove_from_index(index, name):
+    document = index['documents'].pop(name, None)
+    if document is None:
+        return False
+    for buckets, band_key in zip(index['buckets'], band_keys(index, document['signature'])):
+        members = buckets.get(band_key)
+        if members is not None:
+            members.discard(name)
+            if not members:
+                del buckets[band_key]
+    return True
+
+
+def update_similarity_index(index, paths, prune=True):
+    """把文件或文件夹（递归查找.vdf）加入索引，未变化的文件跳过
+
+    prune=True时从索引中删除位于这些文件夹下、但已不存在的文件。
+    返回{'added', 'updated', 'unchanged', 'removed'}。
+    """
+    from .folders import find_vdf_files
+
+    stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+    seen = set()
+    for path in paths:
+        file_paths = find_vdf_files(path) if os.path.isdir(path) else [path]
+        for file_path in file_paths:
+            name = os.path.abspath(file_path)
+            seen.add(name)
+            st = os.stat(file_path)
+            stat_key = [st.st_mtime_ns, st.st_size]
+            document = index['documents'].get(name)
+            if document is not None and document['stat'] == stat_key:
+                stats['unchanged'] += 1
+                continue
+            add_to_index(index, name, read_vdf_file(file_path), stat_key)
+            stats['updated' if document is not None else 'added'] += 1
+
+    if prune:
+        roots = [os.path.join(os.path.abspath(path), '') for path in paths if os.path.isdir(path)]
+        for name in [name for name in index['documents'] if name not in seen]:
+            if any(name.startswith(root) for root in roots):
+                remove_from_index(index, name)
+                stats['removed'] += 1
+    return stats
+
+
+def lut_distance(document1, document2):
+    norm_sum = document1['lut_norm'] + document2['lut_norm']
+    if not norm_sum:
+        return 0.0
+    difference = math.sqrt(sum((a - b) * (a - b) for a, b in zip(document1['lut'], document2['lut'])))
+    return difference / norm_sum
+
+
+def query_similar(index, parsed_data, top_k=5, numeric_weight=0.5, exclude=None):
+    """返回与parsed_data最接近的top_k个文件：[{'name', 'score', 'jaccard', 'lut_distance'}]，得分从高到低
+
+    先取LSH桶中的候选；候选不足top_k个时，按Jaccard估计从所有文件中预选RERANK_FACTOR * top_k个候选，
+    只对预选的文件计算LUT距离。
+    """
+    query = describe_document(index, parsed_data)
+    signature = query['signature']
+    documents = index['documents']
+    num_bins = index['num_bins']
+
+    def jaccard(name):
+        return sum(1 for a, b in zip(signature, documents[name]['signature']) if a == b) / num_bins
+
+    candidates = set()
+    for buckets, band_key in zip(index['buckets'], band_keys(index, signature)):
+        candidates.update(buckets.get(band_key, ()))
+    candidates.discard(exclude)
+    similarities = {name: jaccard(name) for name in candidates}
+    if len(candidates) < top_k:
+        similarities = {name: jaccard(name) for name in documents if name != exclude}
+        shortlist = sorted(similarities, key=lambda name: (-similarities[name], name))[:RERANK_FACTOR * top_k]
+        similarities = {name: similarities[name] for name in shortlist}
+
+    results = []
+    for name, similarity in similarities.items():
+        distance = lut_distance(query, documents[name])
+        results.append({'name': name, 'score': (1 - numeric_weight) * similarity + numeric_weight * (1 - distance),
+                        'jaccard': similarity, 'lut_distance': distance})
+    results.sort(key=lambda result: (-result['score'], result['name']))
+    return results[:top_k]
+
+
+def save_similarity_index(index, index_path):
+    """保存为JSON（LSH桶在载入时由签名重建）"""
+    data = {
+        'num_bins': index['num_bins'],
+        'bands': index['bands'],
+        'lut_dims': index['lut_dims'],
+        'documents': {name: {'signature': list(document['signature']), 'lut': list(document['lut']),
+                             'lut_norm': document['lut_norm'], 'stat': document['stat']}
+                      for name, document in index['documents'].items()},
+    }
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, index_path)
+
+
+def load_similarity_index(index_path):
+    with open(index_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    index = create_similarity_index(data['num_bins'], data['bands'], data['lut_dims'])
+    for name, document in data['documents'].items():
+        document = {'signature': tuple(document['signature']), 'lut': array('d', document['lut']),
+                    'lut_norm': document['lut_norm'], 'stat': document['stat']}
+        index['documents'][name] = document
+        for buckets, band_key in zip(index['buckets'], band_keys(index, document['signature'])):
+            buckets.setdefault(band_key, set()).add(name)
+    return index
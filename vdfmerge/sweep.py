@@ -0,0 +1,139 @@
+"""参数扫描：从一个已解析的基线生成大量只修改少数键值的变体
+
+覆盖项以写时复制的方式叠加在基线上：只复制被修改的章节的行列表，其余章节与基线共享，
+保存时按基线原文切片输出，不重新解析、不深拷贝基线。
+
+覆盖项格式为{(章节, 键): 值}，值为字符串或数字序列（以','连接）。
+"""
+import itertools
+import json
+import os
+
+from .core import (
+    extract_key_from_line,
+    generate_vdf_content,
+    is_key_value_line,
+    replace_value_in_line,
+    separate_key_value_lines,
+)
+
+
+def format_sweep_value(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ','.join(str(component) for component in value)
+    return str(value)
+
+
+def build_key_line_index(parsed_data, keys):
+    """在基线中查找需要覆盖的键所在的行：{(章节, 键): [行下标, ...]}；只扫描涉及的章节"""
+    index = {}
+    sections = {section for section, _ in keys}
+    for section in sections:
+        if section not in parsed_data['data']:
+            raise ValueError(f"Section [{section}] not found in {parsed_data.get('file_name')}")
+        for line_index, line in enumerate(parsed_data['section_content'][section]):
+            if is_key_value_line(line):
+                key = extract_key_from_line(line)
+                if (section, key) in keys:
+                    index.setdefault((section, key), []).append(line_index)
+    for section, key in keys:
+        if (section, key) not in index:
+            raise ValueError(f"Key '{key}' not found in [{section}] of {parsed_data.get('file_name')}")
+    return index
+
+
+def apply_overrides(parsed_data, overrides, line_index=None):
+    """返回叠加了覆盖项的新解析结果，基线本身不被修改
+
+    line_index为build_key_line_index的结果，批量生成时传入可避免每个变体重复查找。
+    """
+    if line_index is None:
+        line_index = build_key_line_index(parsed_data, set(overrides))
+
+    section_content = dict(parsed_data['section_content'])
+    data = dict(parsed_data['data'])
+    original_lines = dict(parsed_data.get('original_key_value_lines', {}))
+    copied_sections = set()
+
+    for (section, key), value in overrides.items():
+        value = format_sweep_value(value)
+        if section not in copied_sections:
+            # 写时复制：只复制被修改的章节
+            section_content[section] = list(section_content[section])
+            data[section] = dict(data[section])
+            original_lines[section] = dict(original_lines.get(section, {}))
+            copied_sections.add(section)
+        lines = section_content[section]
+        for index in line_index[(section, key)]:
+            lines[index] = replace_value_in_line(lines[index], value)
+            original_lines[section][key] = lines[index]
+        data[section][key] = value
+
+    overlay = dict(parsed_data)
+    overlay['section_content'] = section_content
+    overlay['data'] = data
+    overlay['original_key_value_lines'] = original_lines
+    overlay['verbatim_sections'] = set(parsed_data.get('verbatim_sections', ())) - copied_sections
+
+    kv_lines = dict(parsed_data.get('section_key_value_lines', {}))
+    non_kv_lines = dict(parsed_data.get('section_non_key_value_lines', {}))
+    for section in copied_sections:
+        kv_lines[section], non_kv_lines[section] = separate_key_value_lines(section_content[section])
+    overlay['section_key_value_lines'] = kv_lines
+    overlay['section_non_key_value_lines'] = non_kv_lines
+    # 被修改章节的重复键记录已不准确，去掉后按生效值处理
+    overlay['duplicate_keys'] = {section: keys for section, keys in parsed_data.get('duplicate_keys', {}).items()
+                                 if section not in copied_sections}
+    return overlay
+
+
+def expand_sweep_grid(grid):
+    """网格扫描：{(章节, 键): [取值, ...]} -> 所有组合的覆盖项列表"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def iter_sweep(parsed_data, override_list):
+    """逐个生成变体，产出(序号, 覆盖项, 文本)；基线只查找一次键所在的行"""
+    keys = set()
+    for overrides in override_list:
+        keys.update(overrides)
+    line_index = build_key_line_index(parsed_data, keys)
+    for number, overrides in enumerate(override_list):
+        yield number, overrides, generate_vdf_content(apply_overrides(parsed_data, overrides, line_index))
+
+
+def write_sweep(parsed_data, override_list, output_pattern):
+    """把变体逐个写入磁盘，output_pattern如'out/config1_{index:04d}.vdf'，返回[(路径, 覆盖项)]"""
+    written = []
+    for number, overrides, content in iter_sweep(parsed_data, override_list):
+        output_path = output_pattern.format(index=number)
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        written.append((output_path, overrides))
+    return written
+
+
+def load_sweep_spec(spec_path):
+    """读取扫描配置JSON，返回覆盖项列表
+
+    {"grid": {"MLNR": {"sigma": ["1,2", "3,4"]}}} 按网格展开；
+    {"variants": [{"MLNR": {"sigma": "1,2"}}, ...]} 逐个列出；两者可同时给出。
+    """
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    def flatten(nested):
+        return {(section, key): value for section, keys in nested.items() for key, value in keys.items()}
+
+    override_list = []
+    if 'grid' in spec:
+        override_list.extend(expand_sweep_grid(flatten(spec['grid'])))
+    for variant in spec.get('variants', []):
+        override_list.append(flatten(variant))
+    return override_list
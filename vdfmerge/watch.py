@@ -0,0 +1,199 @@
+"""监视模式：文件变化时只重新合并受影响的文件对"""
+import os
+import select
+import struct
+import sys
+import time
+
+from .folders import batch_merge_folders, clone_file, find_vdf_files, get_cached_vdf, merge_file_pair
+
+# inotify事件掩码（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT_HEADER = struct.Struct('iIII')
+
+
+def open_inotify(folders):
+    """为文件夹（含子文件夹）创建inotify监视，返回(fd, {wd: 目录}, add_watch)；不支持inotify时返回None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    watches = {}
+
+    def add_watch(directory):
+        wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            watches[wd] = directory
+
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            add_watch(root)
+    return fd, watches, add_watch
+
+
+def read_inotify_changes(inotify, timeout):
+    """等待inotify事件，返回发生变化的vdf文件路径集合
+
+    无法从事件得知哪些文件变化时返回None：事件队列溢出（IN_Q_OVERFLOW，事件已丢失），
+    或整个子文件夹被移入/移出（其中的文件没有单独的事件）。
+    """
+    fd, watches, add_watch = inotify
+    changed = set()
+    readable, _, _ = select.select([fd], [], [], timeout)
+    if not readable:
+        return changed
+    buffer = os.read(fd, 64 * 1024)
+    offset = 0
+    rescan = False
+    while offset < len(buffer):
+        wd, mask, cookie, name_length = INOTIFY_EVENT_HEADER.unpack_from(buffer, offset)
+        offset += INOTIFY_EVENT_HEADER.size
+        name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b'\0'))
+        offset += name_length
+        if mask & IN_Q_OVERFLOW:
+            rescan = True
+            continue
+        directory = watches.get(wd)
+        if directory is None or not name:
+            continue
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            # 新建的子文件夹也加入监视
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                add_watch(path)
+            if mask & (IN_MOVED_FROM | IN_MOVED_TO):
+                rescan = True
+            continue
+        if name.lower().endswith('.vdf'):
+            changed.add(path)
+    return None if rescan else changed
+
+
+def snapshot_vdf_files(folders):
+    """轮询模式：记录所有vdf文件的修改时间和大小"""
+    snapshot = {}
+    for folder in folders:
+        for file_path in find_vdf_files(folder):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[file_path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def watch_merge_folders(folder1_path, folder2_path, output_folder_path, debounce=0.2, poll_interval=0.5,
+                        use_inotify=True, link_identical=False, schema=None, variants=None, workers=None,
+                        max_inflight_bytes=None):
+    """监视模式：先完整合并一次，之后只重新合并磁盘上发生变化的文件对
+
+    优先使用inotify，不支持时回退到轮询；连续事件在debounce秒内合并为一次处理。
+    folder1的解析结果缓存在内存中，文件未变化时不再重新解析；缓存在第一次完整合并时填入
+    （workers大于1时第一次合并在其他进程中进行，缓存改为在文件对第一次重新合并时填入）。
+    link_identical、schema、variants、workers、max_inflight_bytes用于第一次完整合并（见batch_merge_folders），
+    link_identical和schema同样用于之后的重新合并。按Ctrl+C退出。
+    folder1中的文件被删除时，同时删除它的合并结果（只删除本次监视写入过的输出）。
+    inotify事件队列溢出时重新监视所有子文件夹，并把所有文件当作已变化重新合并。
+    """
+    baselines = {}
+    batch_merge_folders(folder1_path, folder2_path, output_folder_path, link_identical=link_identical, schema=schema,
+                        variants=variants, workers=workers, max_inflight_bytes=max_inflight_bytes,
+                        parsed_cache=baselines)
+    # 输出文件夹中由合并写入的文件名（folder1中的每个文件都有输出）
+    written = {os.path.basename(file) for file in find_vdf_files(folder1_path)}
+
+    folders = (folder1_path, folder2_path)
+    inotify = open_inotify(folders) if use_inotify else None
+    snapshot = None if inotify else snapshot_vdf_files(folders)
+    print(f"\nWatching '{folder1_path}' and '{folder2_path}' "
+          f"({'inotify' if inotify else 'polling'}), press Ctrl+C to stop")
+
+    def wait_for_changes(timeout):
+        nonlocal snapshot
+        if inotify:
+            changed = read_inotify_changes(inotify, timeout)
+            if changed is not None:
+                return changed
+            print("⚠ Lost track of file events (inotify queue overflow or moved folder), re-merging all files")
+            add_watch = inotify[2]
+            for folder in folders:
+                for root, dirs, files in os.walk(folder):
+                    add_watch(root)
+            # 已删除的文件也要处理：加入之前写入过的输出对应的folder1路径
+            return set(snapshot_vdf_files(folders)) | {os.path.join(folder1_path, name) for name in written}
+        time.sleep(timeout)
+        new_snapshot = snapshot_vdf_files(folders)
+        changed = {path for path in set(snapshot) | set(new_snapshot)
+                   if snapshot.get(path) != new_snapshot.get(path)}
+        snapshot = new_snapshot
+        return changed
+
+    try:
+        while True:
+            changed = wait_for_changes(None if inotify else poll_interval)
+            if not changed:
+                continue
+            # 防抖：持续收集事件直到安静debounce秒
+            while True:
+                more = wait_for_changes(debounce)
+                if not more:
+                    break
+                changed |= more
+
+            started = time.perf_counter()
+            vdf1_dict = {os.path.basename(file): file for file in find_vdf_files(folder1_path)}
+            vdf2_dict = {os.path.basename(file): file for file in find_vdf_files(folder2_path)}
+            for filename in sorted({os.path.basename(path) for path in changed}):
+                vdf1_path = vdf1_dict.get(filename)
+                output_path = os.path.join(output_folder_path, filename)
+                if vdf1_path is None:
+                    # folder1中没有（或已删除）该文件：删除之前写入的合并结果
+                    for path in [path for path in baselines if os.path.basename(path) == filename]:
+                        del baselines[path]
+                    if filename in written:
+                        written.discard(filename)
+                        try:
+                            os.remove(output_path)
+                            print(f"✓ Removed output of deleted file: {filename}")
+                        except FileNotFoundError:
+                            pass
+                        except OSError as e:
+                            print(f"✗ Failed to remove {output_path}: {e}")
+                    continue
+                written.add(filename)
+                try:
+                    vdf2_path = vdf2_dict.get(filename)
+                    if vdf2_path is None:
+                        method = clone_file(vdf1_path, output_path)
+                        print(f"✓ Copied unique file from folder1 ({method}): {filename}")
+                        continue
+                    vdf1_parsed = get_cached_vdf(baselines, vdf1_path)
+                    identical_method = merge_file_pair(vdf1_path, vdf2_path, output_path, link_identical=link_identical,
+                                                       vdf1_parsed=vdf1_parsed, schema=schema)
+                    if identical_method:
+                        print(f"✓ Identical files, {identical_method} from folder1: {filename}")
+                    else:
+                        print(f"✓ Re-merged {filename}")
+                except Exception as e:
+                    print(f"✗ Failed to merge {filename}: {e}")
+            print(f"  ({(time.perf_counter() - started) * 1000:.1f} ms)")
+    except KeyboardInterrupt:
+        print("\nWatch stopped")
+    finally:
+        if inotify:
+            os.close(inotify[0])